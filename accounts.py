@@ -0,0 +1,130 @@
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+from astrbot.api import logger
+
+from .dampening import FlapDampener, IncidentCorrelator
+from .notifier import parse_notification_targets
+from .scheduler import PollScheduler, TokenBucket
+from .snapshot_cache import SnapshotCache
+from .state_store import MonitorStateStore
+
+if TYPE_CHECKING:
+    from .metrics import PluginMetrics
+
+DEFAULT_ACCOUNT_NAME = "default"
+STATE_FILE_NAME = "last_monitor_states.json"
+
+
+class MonitorAccount:
+    """一个 UptimeRobot 账号的轮询管线: 独立的状态命名空间、快照、调度与通知目标
+
+    使用同一 API Key 的账号共享一个令牌桶 (速率预算按 Key 计算)。
+    """
+
+    def __init__(self, name: str, api_key: str, rate_limiter: TokenBucket, state_file: Optional[Path],
+                 status_cache_ttl: float, polling_interval: Optional[int] = None,
+                 notification_targets: Optional[List[str]] = None, metrics: Optional["PluginMetrics"] = None):
+        self.name = name
+        self.api_key = api_key
+        self.polling_interval = polling_interval  # None 表示使用全局 polling_interval
+        self.notification_targets = notification_targets  # None 表示使用全局 notification_targets
+        self.rate_limiter = rate_limiter
+        self.scheduler = PollScheduler(rate_limiter)
+        self.state_store = MonitorStateStore(state_file, metrics=metrics)
+        self.snapshot_cache = SnapshotCache(ttl=status_cache_ttl)
+        self.warm_start_pending = False
+        self.suspect_ids: Set[Any] = set()  # 上次轮询中处于"疑似宕机"的监控项
+        self.last_full_sweep_at = 0.0  # 上次完整轮询的开始时间 (time.monotonic())
+        self.last_poll_stats: Dict[str, Any] = {}  # 上次轮询的请求数、流量与解析耗时
+        self.pushed_at: Dict[Any, float] = {}  # 监控项最近一次由 Webhook 更新的时间 (time.monotonic())
+        self.dampener = FlapDampener()
+        self.correlator: Optional[IncidentCorrelator] = None  # 由插件设置 (需要通知回调)
+        self.shared_state_mtime: Optional[int] = None  # 从节点上次载入的状态文件修改时间 (st_mtime_ns)
+
+    def __repr__(self) -> str:
+        # 不输出 API Key
+        return f"MonitorAccount(name={self.name!r})"
+
+
+def _state_file_name(name: str) -> str:
+    if name == DEFAULT_ACCOUNT_NAME:
+        return STATE_FILE_NAME  # 兼容单账号时代的文件名
+    safe_name = re.sub(r'[^0-9A-Za-z_\-]', '_', name)
+    return f"last_monitor_states.{safe_name}.json"
+
+
+def _state_file_for(data_path: Optional[Path], name: str) -> Optional[Path]:
+    if data_path is None:
+        return None
+    return data_path / _state_file_name(name)
+
+
+def parse_account_entry(entry: Any) -> Optional[Dict[str, Any]]:
+    """解析一条账号配置，格式为 '名称|API Key|轮询间隔(可选)|通知目标(可选，逗号分隔)'"""
+    if not isinstance(entry, str) or not entry.strip():
+        return None
+    parts = [part.strip() for part in entry.split('|')]
+    if len(parts) < 2 or not parts[0] or not parts[1]:
+        logger.warning("无效的账号配置 (需要 '名称|API Key|轮询间隔|通知目标')，已跳过。")
+        return None
+    spec: Dict[str, Any] = {'name': parts[0], 'api_key': parts[1], 'polling_interval': None,
+                            'notification_targets': None}
+    if len(parts) > 2 and parts[2]:
+        try:
+            spec['polling_interval'] = int(parts[2])
+        except ValueError:
+            logger.warning(f"账号 '{parts[0]}' 的轮询间隔无效: {parts[2]}，将使用全局 polling_interval。")
+    if len(parts) > 3 and parts[3]:
+        spec['notification_targets'] = parse_notification_targets(
+            [target for target in parts[3].split(',') if target.strip()])
+    return spec
+
+
+def build_accounts(plugin_config: dict, data_path: Optional[Path], status_cache_ttl: float,
+                   rate_limit: float, metrics: Optional["PluginMetrics"] = None) -> List[MonitorAccount]:
+    """根据配置构建账号列表: 顶层 api_key 作为 default 账号，accounts 中的每一项为额外账号"""
+    specs: List[Dict[str, Any]] = []
+    api_key = plugin_config.get('api_key')
+    if isinstance(api_key, str) and api_key.strip():
+        specs.append({'name': DEFAULT_ACCOUNT_NAME, 'api_key': api_key.strip(), 'polling_interval': None,
+                      'notification_targets': None})
+
+    raw_accounts = plugin_config.get('accounts', [])
+    if isinstance(raw_accounts, list):
+        for entry in raw_accounts:
+            spec = parse_account_entry(entry)
+            if spec is None:
+                continue
+            if any(existing['name'] == spec['name'] for existing in specs):
+                logger.warning(f"账号名称 '{spec['name']}' 重复，已跳过。")
+                continue
+            # 名称中的特殊字符在状态文件名中会被替换，不同名称也可能落到同一文件 (如 team.b 与 team_b)
+            state_file_name = _state_file_name(spec['name'])
+            clash = next((existing['name'] for existing in specs
+                          if _state_file_name(existing['name']) == state_file_name), None)
+            if clash is not None:
+                logger.warning(f"账号名称 '{spec['name']}' 与 '{clash}' 对应同一状态文件 {state_file_name}，已跳过。")
+                continue
+            specs.append(spec)
+    else:
+        logger.warning(f"配置中的 accounts 不是列表 (类型: {type(raw_accounts)})，已忽略。")
+
+    buckets: Dict[str, TokenBucket] = {}
+    accounts = []
+    for spec in specs:
+        bucket = buckets.get(spec['api_key'])
+        if bucket is None:
+            bucket = buckets[spec['api_key']] = TokenBucket(rate_limit)
+        accounts.append(MonitorAccount(
+            name=spec['name'],
+            api_key=spec['api_key'],
+            rate_limiter=bucket,
+            state_file=_state_file_for(data_path, spec['name']),
+            status_cache_ttl=status_cache_ttl,
+            polling_interval=spec['polling_interval'],
+            notification_targets=spec['notification_targets'],
+            metrics=metrics,
+        ))
+    return accounts
@@ -0,0 +1,158 @@
+"""对比 getMonitors 响应的两种解析方式: 旧的 json.loads 整页解析并保留完整 dict 树，
+与当前边接收边解析为 MonitorRecord 精简记录。统计解析耗时与峰值内存 (RSS 增量与 tracemalloc 峰值)。
+
+每种方式在独立的子进程中运行，避免彼此的内存高水位互相影响。
+
+用法: python benchmarks/bench_decoding.py [--sizes 1000 10000 50000] [--logs 10] [--response-times 24]
+                                          [--page-size 50] [--repeat 3] [--output bench_decoding.json]
+"""
+import argparse
+import gc
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fake_api import load_plugin_module, make_monitors
+
+CHUNK_SIZE = 64 * 1024
+MODES = ("loads", "stream")
+
+
+def make_pages(size: int, page_size: int, logs: int, response_times: int) -> List[bytes]:
+    """逐页生成响应体 (每页单独序列化，避免生成过程本身抬高内存高水位)"""
+    rnd = random.Random(size)
+    pages = []
+    for offset in range(0, size, page_size):
+        monitors = make_monitors(min(page_size, size - offset))
+        for index, monitor in enumerate(monitors):
+            monitor["id"] += offset
+            monitor["friendly_name"] = f"monitor-{offset + index}"
+            monitor["status"] = rnd.choice((2, 2, 2, 9, 8, 0))
+            if logs:
+                monitor["logs"] = [{"id": rnd.randrange(10 ** 9), "type": rnd.choice((1, 2)),
+                                    "datetime": 1700000000 + i * 60, "duration": rnd.randrange(3600),
+                                    "reason": {"code": "200", "detail": "OK"}} for i in range(logs)]
+            if response_times:
+                monitor["response_times"] = [{"datetime": 1700000000 + i * 300, "value": rnd.randrange(50, 900)}
+                                             for i in range(response_times)]
+                monitor["average_response_time"] = "123.456"
+        body = {"stat": "ok", "pagination": {"offset": offset, "limit": page_size, "total": size},
+                "monitors": monitors}
+        pages.append(json.dumps(body).encode("utf-8"))
+    return pages
+
+
+def parse_loads(pages: List[bytes]) -> List[Dict[str, Any]]:
+    """旧实现: 每页 json.loads，合并后保留完整的监控项 dict"""
+    monitors = []
+    for body in pages:
+        monitors.extend(json.loads(body).get("monitors", []))
+    return monitors
+
+
+def parse_stream(decoding, pages: List[bytes]) -> List[Any]:
+    """当前实现: 每页按块增量解析为 MonitorRecord"""
+    monitors = []
+    for body in pages:
+        decoder = decoding.MonitorStreamDecoder()
+        for start in range(0, len(body), CHUNK_SIZE):
+            decoder.feed(body[start:start + CHUNK_SIZE])
+        monitors.extend(decoder.close().get("monitors", []))
+    return monitors
+
+
+def _max_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # Linux 以 KiB 为单位
+
+
+def run_child(args) -> Dict[str, Any]:
+    decoding = load_plugin_module("decoding")
+    pages = make_pages(args.size, args.page_size, args.logs, args.response_times)
+    parse = parse_loads if args.child == "loads" else lambda bodies: parse_stream(decoding, bodies)
+    gc.collect()
+
+    # 1) 峰值 RSS: 首次解析前后的高水位之差 (响应体本身已计入基线)
+    rss_before = _max_rss_bytes()
+    monitors = parse(pages)
+    rss_peak = _max_rss_bytes() - rss_before
+    count = len(monitors)
+    del monitors
+    gc.collect()
+
+    # 2) 解析耗时: 多次取最小值
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        monitors = parse(pages)
+        timings.append(time.perf_counter() - start)
+        del monitors
+        gc.collect()
+
+    # 3) tracemalloc: 解析过程中的分配峰值与解析后常驻的大小
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    monitors = parse(pages)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mode": args.child,
+        "monitors": count,
+        "body_bytes": sum(len(body) for body in pages),
+        "parse_ms": min(timings) * 1000,
+        "peak_rss_delta_bytes": rss_peak,
+        "traced_peak_bytes": peak - before,
+        "retained_bytes": current - before,
+        "retained_bytes_per_monitor": (current - before) / max(1, count),
+    }
+
+
+def main(args) -> int:
+    results = []
+    for size in args.sizes:
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--size", str(size), "--page-size", str(args.page_size),
+                 "--logs", str(args.logs), "--response-times", str(args.response_times), "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+            results.append(result)
+            print(f"monitors={size:<6} mode={mode:<6} body={result['body_bytes'] / 2 ** 20:7.2f}MiB "
+                  f"parse={result['parse_ms']:8.2f}ms peak RSS +{result['peak_rss_delta_bytes'] / 2 ** 20:7.2f}MiB "
+                  f"traced peak={result['traced_peak_bytes'] / 2 ** 20:7.2f}MiB "
+                  f"retained/monitor={result['retained_bytes_per_monitor']:8.1f}B")
+    if args.output:
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "child", "size")},
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--page-size", type=int, default=50, help="每页监控项数 (真实 API 为 50)")
+    parser.add_argument("--logs", type=int, default=10, help="每个监控项附带的日志条数 (0 表示精简请求)")
+    parser.add_argument("--response-times", type=int, default=24, help="每个监控项附带的响应时间样本数")
+    parser.add_argument("--repeat", type=int, default=3, help="测量解析耗时的重复次数")
+    parser.add_argument("--output", default="", help="结果 JSON 路径，留空则不保存")
+    # 子进程参数 (由基准自身传入)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+    if parsed.child:
+        print(json.dumps(run_child(parsed)))
+        sys.exit(0)
+    sys.exit(main(parsed))
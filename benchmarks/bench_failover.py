@@ -0,0 +1,261 @@
+"""多实例故障切换测试: 在共享数据目录上启动多个插件进程 (均启用 leader_election)，
+验证同一时刻只有一个实例轮询与发送通知，并测量主节点被强制结束 (SIGKILL) 与正常停止 (SIGTERM)
+后其他实例接管所需的时间。
+
+用法: python benchmarks/bench_failover.py [--workers 3] [--ttl 3] [--monitors 200] [--churn 0.05]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fake_api import FakeUptimeRobotAPI, load_plugin_module
+
+
+def emit(worker: int, event: str, **fields):
+    print(json.dumps({"worker": worker, "event": event, "t": time.time(), **fields}), flush=True)
+
+
+class WorkerContext:
+    """替代 AstrBot Context，把每条通知记录到标准输出"""
+
+    def __init__(self, worker: int):
+        self.worker = worker
+
+    async def send_message(self, session: str, message_chain) -> bool:
+        emit(self.worker, "notify")
+        return True
+
+
+async def run_worker(args) -> int:
+    module = load_plugin_module()
+    if not args.verbose:
+        module.logger.setLevel(logging.CRITICAL)
+    data_dir = Path(args.data_dir)
+    plugin = module.UptimeRobotPlugin(WorkerContext(args.worker), {
+        "api_key": "failover",
+        "notification_targets": ["bench:GroupMessage:1"],
+        "api_rate_limit": 1_000_000,
+        "warm_start": False,
+        "history_enabled": False,
+        "incident_window": 0,
+        "leader_election": True,
+        "leader_lease_ttl": args.ttl,
+    })
+    plugin.api_base_url = args.api_url
+    # 所有实例共享同一个数据目录
+    plugin.data_path = data_dir
+    for account in plugin.accounts:
+        account.state_store.path = data_dir / account.state_store.path.name
+        account.scheduler.next_delay = lambda cycle_started_at: args.poll_delay
+
+    poll_once = plugin._poll_once
+    on_change = plugin._on_leadership_change
+
+    async def traced_poll_once(*a, **kw):
+        emit(args.worker, "poll")
+        await poll_once(*a, **kw)
+
+    async def traced_on_change(leader: bool):
+        emit(args.worker, "role", leader=leader)
+        await on_change(leader)
+
+    plugin._poll_once = traced_poll_once
+    plugin._on_leadership_change = traced_on_change
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    await plugin.initialize()
+    release = plugin.election.release
+
+    def traced_release():
+        # 释放租约前轮询已停止、通知已发送完毕，此时任期结束
+        emit(args.worker, "role", leader=False)
+        release()
+
+    plugin.election.release = traced_release
+    emit(args.worker, "ready", owner=plugin.election.owner_id)
+    await stop.wait()
+    await plugin.terminate()
+    emit(args.worker, "stopped")
+    return 0
+
+
+class Cluster:
+    """启动并跟踪多个工作进程的事件"""
+
+    def __init__(self, args, api_url: str, data_dir: Path):
+        self.args = args
+        self.api_url = api_url
+        self.data_dir = data_dir
+        self.processes: Dict[int, asyncio.subprocess.Process] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.leader_changed = asyncio.Event()
+        self._readers: List[asyncio.Task] = []
+
+    async def start(self, count: int):
+        for worker in range(count):
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, __file__, "--worker", str(worker), "--data-dir", str(self.data_dir),
+                "--api-url", self.api_url, "--ttl", str(self.args.ttl), "--poll-delay", str(self.args.poll_delay),
+                *(["--verbose"] if self.args.verbose else []),
+                stdout=asyncio.subprocess.PIPE)
+            self.processes[worker] = process
+            self._readers.append(asyncio.create_task(self._read(process)))
+
+    async def _read(self, process):
+        async for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            self.events.append(event)
+            if event["event"] == "role" and event["leader"]:
+                self.leader_changed.set()
+
+    def leaders(self) -> List[int]:
+        """按事件推算当前的主节点 (被强制结束的实例视为已失去角色)"""
+        state: Dict[int, bool] = {}
+        for event in self.events:
+            if event["event"] == "role":
+                state[event["worker"]] = event["leader"]
+            elif event["event"] in ("killed", "stopped"):
+                state[event["worker"]] = False
+        return [worker for worker, leader in state.items() if leader]
+
+    async def wait_for_leader(self, exclude: Optional[int], timeout: float) -> Optional[int]:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            leaders = [worker for worker in self.leaders() if worker != exclude]
+            if leaders:
+                return leaders[0]
+            self.leader_changed.clear()
+            try:
+                await asyncio.wait_for(self.leader_changed.wait(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+        return None
+
+    def kill(self, worker: int):
+        self.processes[worker].kill()
+        self.events.append({"worker": worker, "event": "killed", "t": time.time()})
+
+    async def stop(self, worker: int):
+        self.processes[worker].send_signal(signal.SIGTERM)
+        await self.processes[worker].wait()
+
+    async def close(self):
+        for process in self.processes.values():
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+        await asyncio.gather(*self._readers, return_exceptions=True)
+
+    def check_exclusive(self) -> List[str]:
+        """检查轮询与通知是否只来自当时的主节点，以及主节点任期是否重叠"""
+        problems = []
+        terms: List[List[float]] = []  # [worker, 开始, 结束]
+        open_terms: Dict[int, List] = {}
+        for event in sorted(self.events, key=lambda e: e["t"]):
+            worker = event["worker"]
+            if event["event"] == "role" and event["leader"]:
+                open_terms[worker] = [worker, event["t"], float("inf")]
+                terms.append(open_terms[worker])
+            elif event["event"] in ("role", "killed", "stopped") and worker in open_terms:
+                open_terms.pop(worker)[2] = event["t"]
+            elif event["event"] in ("poll", "notify") and worker not in open_terms:
+                problems.append(f"worker {worker} 在非主节点状态下执行了 {event['event']}")
+        for i, (worker_a, start_a, end_a) in enumerate(terms):
+            for worker_b, start_b, end_b in terms[i + 1:]:
+                if worker_a != worker_b and start_a < end_b and start_b < end_a:
+                    problems.append(f"worker {worker_a} 与 worker {worker_b} 的主节点任期重叠")
+        return problems
+
+
+async def run(args) -> int:
+    server = FakeUptimeRobotAPI(args.monitors, churn_rate=args.churn, seed=1)
+    api_url = await server.start()
+    bound = args.ttl + args.ttl / 3
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cluster = Cluster(args, api_url, Path(tmp_dir))
+        try:
+            await cluster.start(args.workers)
+            leader = await cluster.wait_for_leader(None, bound * 2)
+            if leader is None:
+                print("没有实例成为主节点。")
+                return 1
+            print(f"初始主节点: worker {leader}")
+            await asyncio.sleep(args.observe)
+
+            # 1) 强制结束主节点: 租约到期后由其他实例接管
+            killed_at = time.time()
+            cluster.kill(leader)
+            new_leader = await cluster.wait_for_leader(leader, bound * 3)
+            takeover = next(e["t"] for e in reversed(cluster.events)
+                            if e["event"] == "role" and e["leader"]) - killed_at if new_leader is not None else None
+            results["kill_takeover_seconds"] = takeover
+            print(f"SIGKILL worker {leader} -> worker {new_leader} 接管，用时 "
+                  f"{takeover if takeover is not None else float('nan'):.2f}s (上限 {bound:.2f}s)")
+            if new_leader is None:
+                return 1
+            await asyncio.sleep(args.observe)
+
+            # 2) 正常停止主节点: 租约被主动释放，下次检查即接管
+            if args.workers > 2:
+                stopped_at = time.time()
+                await cluster.stop(new_leader)
+                third = await cluster.wait_for_leader(new_leader, bound * 3)
+                takeover = next(e["t"] for e in reversed(cluster.events)
+                                if e["event"] == "role" and e["leader"]) - stopped_at if third is not None else None
+                results["stop_takeover_seconds"] = takeover
+                print(f"SIGTERM worker {new_leader} -> worker {third} 接管，用时 "
+                      f"{takeover if takeover is not None else float('nan'):.2f}s (上限 {args.ttl / 3:.2f}s + 停止耗时)")
+                await asyncio.sleep(args.observe)
+        finally:
+            await cluster.close()
+            await server.stop()
+
+    polls: Dict[int, int] = {}
+    notifications: Dict[int, int] = {}
+    for event in cluster.events:
+        if event["event"] == "poll":
+            polls[event["worker"]] = polls.get(event["worker"], 0) + 1
+        elif event["event"] == "notify":
+            notifications[event["worker"]] = notifications.get(event["worker"], 0) + 1
+    print(f"各实例轮询次数: {polls}，通知数: {notifications}，API 请求 {server.request_count} 次")
+
+    problems = cluster.check_exclusive()
+    if results.get("kill_takeover_seconds") is None or results["kill_takeover_seconds"] > bound + args.slack:
+        problems.append("强制结束主节点后未在租约上限内完成接管")
+    for problem in problems:
+        print(f"失败: {problem}")
+    if not problems:
+        print("通过: 同一时刻只有一个实例轮询与通知，接管时间在上限内。")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=3, help="实例 (进程) 数")
+    parser.add_argument("--ttl", type=int, default=3, help="主节点租约有效期 (秒)")
+    parser.add_argument("--monitors", type=int, default=200)
+    parser.add_argument("--churn", type=float, default=0.05, help="每次轮询状态变化的监控项比例")
+    parser.add_argument("--poll-delay", type=float, default=0.5, help="轮询间隔 (秒)")
+    parser.add_argument("--observe", type=float, default=3.0, help="每个阶段观察的时长 (秒)")
+    parser.add_argument("--slack", type=float, default=1.0, help="接管时间上限的容差 (秒)")
+    parser.add_argument("--verbose", action="store_true", help="输出插件日志")
+    # 工作进程参数 (由测试自身传入)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+    if parsed.worker is not None:
+        sys.exit(asyncio.run(run_worker(parsed)))
+    sys.exit(asyncio.run(run(parsed)))
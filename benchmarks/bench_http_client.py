@@ -0,0 +1,91 @@
+"""对比 requests + to_thread 与插件共享 aiohttp 会话调用 getMonitors 的延迟与线程占用。
+
+用法: python benchmarks/bench_http_client.py [--calls 200] [--concurrency 4] [--monitors 50]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from fake_api import FakeUptimeRobotAPI, load_plugin_module
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """统计提交到默认执行器的任务数 (即占用线程的次数)"""
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = 0
+
+    def submit(self, *args, **kwargs):
+        self.jobs += 1
+        return super().submit(*args, **kwargs)
+
+
+def _summary(name: str, latencies, executor_jobs: int) -> str:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return (f"{name:<22} mean={statistics.mean(latencies) * 1000:7.2f}ms "
+            f"p50={statistics.median(latencies) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms "
+            f"executor_jobs={executor_jobs}")
+
+
+async def _run(call, calls: int, concurrency: int):
+    latencies = []
+    executor = CountingExecutor()
+    asyncio.get_running_loop().set_default_executor(executor)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            result = await call()
+            latencies.append(time.perf_counter() - start)
+            assert result.get("stat") == "ok", result
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    executor.shutdown(wait=False)
+    return latencies, executor.jobs
+
+
+async def main(args):
+    server = FakeUptimeRobotAPI(monitor_count=args.monitors)
+    base_url = await server.start()
+    try:
+        module = load_plugin_module()
+        plugin = module.UptimeRobotPlugin(SimpleNamespace(), {
+            "api_key": "bench",
+            "api_rate_limit": 1_000_000,  # 只测 HTTP 延迟，不受速率预算限制
+        })
+        plugin.api_base_url = base_url
+        try:
+            latencies, jobs = await _run(lambda: plugin._call_uptimerobot_api("getMonitors"),
+                                         args.calls, args.concurrency)
+            print(_summary("aiohttp shared session", latencies, jobs))
+        finally:
+            await plugin._close_http_session()
+        try:
+            import requests
+        except ImportError:
+            requests = None
+            print("未安装 requests，跳过旧实现的对比。")
+        if requests is not None:
+            def legacy_post():
+                response = requests.post(f"{base_url}/getMonitors",
+                                         data={"api_key": "bench", "format": "json"}, timeout=15)
+                return response.json()
+
+            latencies, jobs = await _run(lambda: asyncio.to_thread(legacy_post), args.calls, args.concurrency)
+            print(_summary("requests+to_thread", latencies, jobs))
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--monitors", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,294 @@
+"""端到端轮询基准: 用本地 API 替身驱动 UptimeRobotPlugin._polling_loop，统计轮询延迟、比较耗时、
+每个监控项的内存占用、状态文件 I/O 与通知吞吐，并将结果保存为 JSON 以便发现性能回退。
+
+用法: python benchmarks/bench_polling.py [--sizes 100 1000 10000] [--polls 30] [--latency 0.02]
+                                         [--failure-rate 0.02] [--churn 0.01] [--output bench_polling.json]
+                                         [--baseline old.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fake_api import FakeUptimeRobotAPI, load_plugin_module
+
+# 与基线比较时检查的指标 (数值越大越差)
+REGRESSION_METRICS = [
+    ("poll_latency_ms", "p95"),
+    ("diff_ms", "mean"),
+    ("memory", "bytes_per_monitor"),
+    ("state_file", "write_ms_mean"),
+    ("notifications", "lag_ms_p95"),
+]
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+class MockContext:
+    """替代 AstrBot Context，记录每条通知从入队到发送完成的延迟"""
+
+    def __init__(self, send_latency: float):
+        self.send_latency = send_latency
+        self.submitted: Dict[str, deque] = {}
+        self.lags: List[float] = []
+        self.sent = 0
+        self.first_submit_at = None
+        self.last_sent_at = None
+
+    def record_submit(self, targets: List[str]):
+        now = time.perf_counter()
+        if self.first_submit_at is None:
+            self.first_submit_at = now
+        for target in targets:
+            self.submitted.setdefault(target, deque()).append(now)
+
+    async def send_message(self, session: str, message_chain) -> bool:
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        now = time.perf_counter()
+        queue = self.submitted.get(session)
+        if queue:
+            # 每个目标的队列按 FIFO 发送，可与入队时间一一对应
+            self.lags.append(now - queue.popleft())
+        self.sent += 1
+        self.last_sent_at = now
+        return True
+
+
+def _make_plugin(module, state_store_module, context, tmp: Path, args, targets: List[str]):
+    plugin = module.UptimeRobotPlugin(context, {
+        "api_key": "bench",
+        "notification_targets": targets,
+        "api_rate_limit": 1_000_000,  # 基准只测插件自身的开销，不受速率预算限制
+        "pagination_concurrency": args.pagination_concurrency,
+        "warm_start": False,
+        "history_enabled": False,
+        "incident_window": args.incident_window,
+    })
+    account = plugin.accounts[0]
+    account.state_store = state_store_module.MonitorStateStore(tmp / "last_monitor_states.json")
+    return plugin, account
+
+
+async def _measure_memory(module, state_store_module, size: int, base_url: str, tmp: Path, args) -> Dict[str, Any]:
+    """一次完整轮询后插件常驻内存 (状态索引 + 快照) 的增量"""
+    plugin, account = _make_plugin(module, state_store_module, MockContext(0), tmp / "memory", args, [])
+    plugin.api_base_url = base_url
+    plugin._get_http_session()
+    plugin._configure_scheduler(account, plugin.plugin_config)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        await plugin._poll_once(account, plugin.plugin_config)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    await plugin.terminate()
+    retained = current - before
+    return {
+        "retained_bytes": retained,
+        "peak_bytes": peak - before,
+        "bytes_per_monitor": retained / size,
+    }
+
+
+async def run_size(module, state_store_module, size: int, args) -> Dict[str, Any]:
+    server = FakeUptimeRobotAPI(size, latency=args.latency, page_size=args.page_size,
+                                failure_rate=args.failure_rate, churn_rate=args.churn, seed=size)
+    base_url = await server.start()
+    context = MockContext(args.send_latency)
+    targets = [f"bench:GroupMessage:{i}" for i in range(args.targets)]
+    poll_latencies: List[float] = []
+    diff_times: List[float] = []  # 每轮轮询中比较 (_compare_monitor_page) 的累计耗时
+    diff_in_poll = [0.0]
+    write_times: List[float] = []
+    done = asyncio.Event()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        (tmp / "memory").mkdir()
+        plugin, account = _make_plugin(module, state_store_module, context, tmp, args, targets)
+        plugin.api_base_url = base_url
+
+        # --- 在实例上包装被测方法以采集耗时 (不修改插件代码) ---
+        poll_once = plugin._poll_once
+        compare_page = plugin._compare_monitor_page
+        submit = plugin.notifier.submit
+        write_atomic = account.state_store._write_atomic
+
+        async def timed_poll_once(*a, **kw):
+            diff_in_poll[0] = 0.0
+            start = time.perf_counter()
+            await poll_once(*a, **kw)
+            poll_latencies.append(time.perf_counter() - start)
+            diff_times.append(diff_in_poll[0])
+            if len(poll_latencies) >= args.polls:
+                done.set()
+
+        def timed_compare(*a, **kw):
+            start = time.perf_counter()
+            result = compare_page(*a, **kw)
+            diff_in_poll[0] += time.perf_counter() - start
+            return result
+
+        def tracked_submit(text, targets=None, **kw):
+            context.record_submit(plugin.notifier.targets if targets is None else targets)
+            submit(text, targets, **kw)
+
+        def timed_write(*a, **kw):
+            start = time.perf_counter()
+            result = write_atomic(*a, **kw)
+            write_times.append(time.perf_counter() - start)
+            return result
+
+        plugin._poll_once = timed_poll_once
+        plugin._compare_monitor_page = timed_compare
+        plugin.notifier.submit = tracked_submit
+        account.state_store._write_atomic = timed_write
+        # 轮询之间不等待，连续执行 args.polls 轮
+        account.scheduler.next_delay = lambda cycle_started_at: 0.0
+
+        started_at = time.perf_counter()
+        await plugin.initialize()
+        await done.wait()
+        polling_seconds = time.perf_counter() - started_at
+        plugin.polling_task.cancel()
+        await asyncio.gather(plugin.polling_task, return_exceptions=True)
+        await account.state_store.flush()
+        state_file = account.state_store.path
+        state_file_size = state_file.stat().st_size if state_file.exists() else 0
+        # terminate 会等待通知队列发送完毕
+        await plugin.terminate()
+
+        memory = await _measure_memory(module, state_store_module, size, base_url, tmp, args)
+    await server.stop()
+
+    notify_seconds = ((context.last_sent_at - context.first_submit_at)
+                      if context.sent and context.first_submit_at is not None else 0.0)
+    result = {
+        "monitors": size,
+        "polls": len(poll_latencies),
+        "api_requests": server.request_count,
+        "api_failures": server.failure_count,
+        "status_changes": server.churned,
+        "polling_seconds": polling_seconds,
+        "poll_latency_ms": _percentiles([t * 1000 for t in poll_latencies]),
+        "diff_ms": _percentiles([t * 1000 for t in diff_times]),
+        "memory": memory,
+        "state_file": {
+            "writes": len(write_times),
+            "write_ms_mean": sum(write_times) / len(write_times) * 1000 if write_times else 0.0,
+            "write_ms_max": max(write_times) * 1000 if write_times else 0.0,
+            "size_bytes": state_file_size,
+        },
+        "notifications": {
+            "sent": context.sent,
+            "failed": plugin.notifier.failed,
+            "per_second": context.sent / notify_seconds if notify_seconds > 0 else 0.0,
+            "lag_ms_p50": _percentiles([t * 1000 for t in context.lags]).get("p50", 0.0),
+            "lag_ms_p95": _percentiles([t * 1000 for t in context.lags]).get("p95", 0.0),
+        },
+    }
+    poll = result["poll_latency_ms"]
+    print(f"monitors={size:<6} polls={result['polls']:<4} poll p50={poll['p50']:8.2f}ms p95={poll['p95']:8.2f}ms "
+          f"diff mean={result['diff_ms'].get('mean', 0.0):7.3f}ms "
+          f"mem/monitor={memory['bytes_per_monitor']:7.1f}B "
+          f"state writes={len(write_times)} ({result['state_file']['write_ms_mean']:.2f}ms) "
+          f"notify sent={context.sent} lag p95={result['notifications']['lag_ms_p95']:.1f}ms")
+    return result
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline_path: Path, tolerance: float) -> List[str]:
+    """与基线结果比较，返回超出容差的指标"""
+    baseline = {entry["monitors"]: entry for entry in json.loads(baseline_path.read_text("utf-8"))["results"]}
+    regressions = []
+    for entry in results:
+        old = baseline.get(entry["monitors"])
+        if old is None:
+            continue
+        for section, key in REGRESSION_METRICS:
+            new_value = entry.get(section, {}).get(key)
+            old_value = old.get(section, {}).get(key)
+            if not new_value or not old_value:
+                continue
+            if new_value > old_value * (1 + tolerance):
+                regressions.append(f"monitors={entry['monitors']} {section}.{key}: "
+                                   f"{old_value:.3f} -> {new_value:.3f} (+{(new_value / old_value - 1) * 100:.0f}%)")
+    return regressions
+
+
+async def main(args) -> int:
+    module = load_plugin_module()
+    state_store_module = load_plugin_module("state_store")
+    # 每个状态变化和模拟的 API 失败都会输出日志，基准运行时默认关闭
+    if not args.verbose:
+        module.logger.setLevel(logging.CRITICAL)
+    results = [await run_size(module, state_store_module, size, args) for size in args.sizes]
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "verbose")},
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存到 {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, Path(args.baseline), args.tolerance)
+        if regressions:
+            print("发现性能回退:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("与基线相比未发现性能回退。")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--polls", type=int, default=30, help="每个规模执行的轮询次数")
+    parser.add_argument("--page-size", type=int, default=50, help="API 替身每页返回的监控项数")
+    parser.add_argument("--pagination-concurrency", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个 API 请求的附加延迟 (秒)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="API 请求失败的概率")
+    parser.add_argument("--churn", type=float, default=0.01, help="每次轮询状态变化的监控项比例")
+    parser.add_argument("--targets", type=int, default=2, help="通知目标数")
+    parser.add_argument("--incident-window", type=int, default=0, help="事件合并窗口 (秒)，默认不等待")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="模拟发送一条通知的耗时 (秒)")
+    parser.add_argument("--output", default="bench_polling.json", help="结果 JSON 路径，留空则不保存")
+    parser.add_argument("--baseline", help="用于比较的基线结果 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="与基线比较时允许的相对退化")
+    parser.add_argument("--verbose", action="store_true", help="输出插件日志")
+    sys.exit(asyncio.run(main(parser.parse_args())))
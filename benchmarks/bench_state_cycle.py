@@ -0,0 +1,99 @@
+"""对比旧的 "每次轮询重读 JSON + 全量重写" 与内存状态索引 + 写后持久化的单次轮询开销。
+
+用法: python benchmarks/bench_state_cycle.py [--sizes 1000 10000] [--cycles 20] [--churn 0.01]
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from fake_api import load_plugin_module, make_monitors
+
+
+def _churn(monitors, records, rate: float):
+    """同时翻转原始 dict 与 MonitorRecord 中相同监控项的状态，两种实现看到一致的变化"""
+    for index in random.sample(range(len(monitors)), int(len(monitors) * rate)):
+        status = 9 if monitors[index]["status"] == 2 else 2
+        monitors[index]["status"] = status
+        records[index].status = status
+
+
+def legacy_cycle(path: Path, monitors):
+    """旧实现: 读文件 -> 重建 dict -> 比较 -> 以 indent=4 重写完整响应"""
+    io_time = 0.0
+    start = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    io_time += time.perf_counter() - start
+    last_states = json.loads(content)
+    last_dict = {m["id"]: m for m in last_states.get("monitors", []) if "id" in m}
+    changed = [m for m in monitors
+               if m["id"] in last_dict and last_dict[m["id"]].get("status") != m["status"]]
+    start = time.perf_counter()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"stat": "ok", "monitors": monitors}, f, ensure_ascii=False, indent=4)
+    io_time += time.perf_counter() - start
+    return len(changed), io_time
+
+
+async def store_cycle(plugin, account, records):
+    """新实现: 与内存索引比较 (输入为解码后的 MonitorRecord)，仅在有变化时原子写盘"""
+    changed = plugin._compare_monitor_page(account, records)
+    start = time.perf_counter()
+    await account.state_store.flush()
+    return len(changed), time.perf_counter() - start
+
+
+async def run_size(module, state_store_module, decoding_module, size: int, cycles: int, churn: float):
+    monitors = make_monitors(size)
+    records = [decoding_module.MonitorRecord.from_dict(monitor) for monitor in monitors]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.json"
+        legacy_path.write_text(json.dumps({"stat": "ok", "monitors": monitors}, indent=4), encoding="utf-8")
+
+        plugin = module.UptimeRobotPlugin(SimpleNamespace(), {"api_key": "bench"})
+        account = plugin.accounts[0]
+        account.state_store = state_store_module.MonitorStateStore(Path(tmp) / "store.json")
+        plugin._compare_monitor_page(account, records, report_changes=False)
+        await account.state_store.flush()
+
+        for name in ("legacy", "store"):
+            random.seed(size)
+            cpu_total = io_total = 0.0
+            for _ in range(cycles):
+                _churn(monitors, records, churn)
+                cpu_start = time.process_time()
+                if name == "legacy":
+                    _, io_time = legacy_cycle(legacy_path, monitors)
+                else:
+                    _, io_time = await store_cycle(plugin, account, records)
+                cpu_total += time.process_time() - cpu_start
+                io_total += io_time
+            file_size = (legacy_path if name == "legacy" else account.state_store.path).stat().st_size
+            results[name] = (cpu_total / cycles * 1000, io_total / cycles * 1000, file_size)
+        await plugin._close_http_session()
+
+    for name, (cpu_ms, io_ms, file_size) in results.items():
+        print(f"monitors={size:<6} {name:<7} cpu/poll={cpu_ms:8.2f}ms io/poll={io_ms:8.2f}ms "
+              f"state_file={file_size / 1024:9.1f}KiB")
+
+
+async def main(args):
+    module = load_plugin_module()
+    state_store_module = load_plugin_module("state_store")
+    decoding_module = load_plugin_module("decoding")
+    for size in args.sizes:
+        await run_size(module, state_store_module, decoding_module, size, args.cycles, args.churn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.01, help="每次轮询状态变化的监控项比例")
+    asyncio.run(main(parser.parse_args()))
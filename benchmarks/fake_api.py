@@ -0,0 +1,116 @@
+"""本地 UptimeRobot API 替身，供基准测试使用。"""
+import asyncio
+import gzip
+import importlib
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_plugin_module(name: str = "main"):
+    """以包的形式导入插件模块 (与 AstrBot 加载方式一致)"""
+    if str(PLUGIN_ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(PLUGIN_ROOT.parent))
+    return importlib.import_module(f"{PLUGIN_ROOT.name}.{name}")
+
+
+def make_monitors(count: int) -> List[Dict[str, Any]]:
+    """生成 count 个状态正常的监控项"""
+    return [
+        {
+            "id": 780000000 + i,
+            "friendly_name": f"monitor-{i}",
+            "url": f"https://example-{i}.invalid",
+            "type": 1,
+            "interval": 300,
+            "status": 2,
+        }
+        for i in range(count)
+    ]
+
+
+class FakeUptimeRobotAPI:
+    """在 127.0.0.1 上监听的 getMonitors 替身
+
+    - page_size: 每页最多返回的监控项数 (真实 API 为 50)
+    - latency: 每个请求的附加延迟 (秒)
+    - failure_rate: 请求以 HTTP 500 或 stat=fail 失败的概率
+    - churn_rate: 每次完整轮询开始 (offset=0 且未过滤) 时切换 up/down 状态的监控项比例
+    """
+
+    def __init__(self, monitor_count: int = 50, latency: float = 0.0, page_size: int = 50,
+                 failure_rate: float = 0.0, churn_rate: float = 0.0, seed: int = 0):
+        self.monitors = make_monitors(monitor_count)
+        self.latency = latency
+        self.page_size = max(1, page_size)
+        self.failure_rate = failure_rate
+        self.churn_rate = churn_rate
+        self._random = random.Random(seed)
+        self.request_count = 0
+        self.failure_count = 0
+        self.churned = 0  # 累计切换状态的次数
+        self._runner: web.AppRunner = None
+        self.base_url = ""
+
+    def churn(self):
+        """按 churn_rate 随机切换一批监控项的 up/down 状态"""
+        count = int(len(self.monitors) * self.churn_rate)
+        for monitor in self._random.sample(self.monitors, count):
+            monitor["status"] = 9 if monitor["status"] == 2 else 2
+        self.churned += count
+
+    async def _get_monitors(self, request: web.Request) -> web.Response:
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        form = await request.post()
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.failure_count += 1
+            if self._random.random() < 0.5:
+                return web.Response(status=500, text="Internal Server Error")
+            return web.json_response({"stat": "fail", "error": {"type": "internal", "message": "fake failure"}})
+        offset = int(form.get("offset", 0))
+        limit = min(int(form.get("limit", 50)), self.page_size)
+        if offset == 0 and self.churn_rate and not form.get("monitors") and not form.get("statuses"):
+            self.churn()
+        monitors = self.monitors
+        # 与真实 API 一样支持按 ID / 状态过滤 (以 '-' 分隔)
+        if form.get("monitors"):
+            wanted_ids = {int(monitor_id) for monitor_id in form["monitors"].split("-")}
+            monitors = [monitor for monitor in monitors if monitor["id"] in wanted_ids]
+        if form.get("statuses"):
+            wanted_statuses = {int(status) for status in form["statuses"].split("-")}
+            monitors = [monitor for monitor in monitors if monitor["status"] in wanted_statuses]
+        body = {
+            "stat": "ok",
+            "pagination": {"offset": offset, "limit": limit, "total": len(monitors)},
+            "monitors": monitors[offset:offset + limit],
+        }
+        raw = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            # 在事件循环内直接压缩，避免 aiohttp 把压缩任务丢进线程池干扰统计
+            raw = gzip.compress(raw, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(body=raw, headers=headers)
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/v2/getMonitors", self._get_monitors)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/v2"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from typing import Any, Callable, Container, Dict, List, Optional
+
+from astrbot.api import logger
+
+DEFAULT_CONFIRM_OBSERVATIONS = 1  # 状态变化需要连续观察到的次数 (1 表示立即通知)
+DEFAULT_FLAP_THRESHOLD = 4.0  # 抖动分数达到此值时开始抑制通知 (0 表示不检测抖动)
+DEFAULT_FLAP_HALF_LIFE = 900  # 抖动分数的半衰期 (秒)
+FLAP_REUSE_RATIO = 0.4  # 分数衰减到 阈值 × 此比例 以下时结束抖动状态
+DEFAULT_INCIDENT_WINDOW = 10  # 汇总同一事件中状态变化的时间窗口 (秒)
+DEFAULT_STORM_THRESHOLD = 10  # 一个事件中的变化数达到此值时只发送摘要
+
+
+class _MonitorTrack:
+    """单个监控项的去抖状态 (只为发生过状态变化的监控项创建)"""
+    __slots__ = ('name', 'change', 'confirmed_status', 'pending_status', 'observations', 'score', 'scored_at',
+                 'flapping')
+
+    def __init__(self, name: str, confirmed_status: Any):
+        self.name = name
+        self.change: Optional[Dict[str, Any]] = None  # 待确认的变化 (最近一次原始变化，old_status 为已确认状态)
+        self.confirmed_status = confirmed_status
+        self.pending_status: Any = None
+        self.observations = 0
+        self.score = 0.0
+        self.scored_at = 0.0
+        self.flapping = False
+
+
+class FlapDampener:
+    """逐监控项的去抖与抖动抑制
+
+    - 滞回: 新状态需要被连续观察到 confirm_observations 次才会确认并通知，期间恢复原状态则静默取消
+    - 抖动评分: 每次原始状态变化加 1 分，按 half_life 指数衰减；分数达到 flap_threshold 时
+      进入抖动状态，只通知一次 "开始抖动"，之后的变化不再逐条通知，直到分数回落并通知当前状态
+
+    每轮的开销只与本轮的变化数、待确认数和抖动中的监控项数成正比，与监控项总数无关。
+    """
+
+    def __init__(self, confirm_observations: int = DEFAULT_CONFIRM_OBSERVATIONS,
+                 flap_threshold: float = DEFAULT_FLAP_THRESHOLD, half_life: float = DEFAULT_FLAP_HALF_LIFE):
+        self.confirm_observations = max(1, confirm_observations)
+        self.flap_threshold = max(0.0, flap_threshold)
+        self.half_life = max(1.0, half_life)
+        self._tracks: Dict[Any, _MonitorTrack] = {}
+        self._pending: Dict[Any, _MonitorTrack] = {}
+        self._flapping: Dict[Any, _MonitorTrack] = {}
+
+    def configure(self, confirm_observations: int, flap_threshold: float, half_life: float):
+        self.confirm_observations = max(1, confirm_observations)
+        self.flap_threshold = max(0.0, flap_threshold)
+        self.half_life = max(1.0, half_life)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    @property
+    def flapping_ids(self) -> List[Any]:
+        return list(self._flapping)
+
+    def _decayed_score(self, track: _MonitorTrack, now: float) -> float:
+        if track.score:
+            track.score *= 0.5 ** ((now - track.scored_at) / self.half_life)
+        track.scored_at = now
+        return track.score
+
+    def process(self, changes: List[Dict[str, Any]], observed: Container[Any],
+                current_status: Callable[[Any], Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """输入本轮的原始变化，返回需要通知的变化 (含抖动开始/结束的提示)
+
+        observed 为本轮实际观察到的监控项 (用于累计连续观察次数)，current_status 返回监控项的最新原始状态。
+        """
+        now = time.monotonic() if now is None else now
+        notify: List[Dict[str, Any]] = []
+        changed_ids = set()
+
+        for change in changes:
+            monitor_id = change['id']
+            changed_ids.add(monitor_id)
+            track = self._tracks.get(monitor_id)
+            if track is None:
+                track = self._tracks[monitor_id] = _MonitorTrack(change['name'], change['old_status'])
+            track.name = change['name']
+
+            if self.flap_threshold:
+                track.score = self._decayed_score(track, now) + 1.0
+                if not track.flapping and track.score >= self.flap_threshold:
+                    track.flapping = True
+                    self._flapping[monitor_id] = track
+                    notify.append({**change, 'flap': 'start', 'flap_score': track.score})
+
+            if change['new_status'] == track.confirmed_status:
+                # 在确认前恢复到原状态: 静默取消
+                self._pending.pop(monitor_id, None)
+                track.change = None
+                self._maybe_forget(monitor_id, track, now)
+                continue
+            track.change = {**change, 'old_status': track.confirmed_status}
+            track.pending_status = change['new_status']
+            track.observations = 1
+            self._pending[monitor_id] = track
+
+        # 累计待确认变化的连续观察次数，达到阈值即确认
+        for monitor_id, track in list(self._pending.items()):
+            if monitor_id not in changed_ids:
+                status = current_status(monitor_id)
+                if status is None:  # 监控项已被删除
+                    del self._pending[monitor_id]
+                    self._tracks.pop(monitor_id, None)
+                    self._flapping.pop(monitor_id, None)
+                    continue
+                if monitor_id not in observed or status != track.pending_status:
+                    continue
+                track.observations += 1
+            if track.observations < self.confirm_observations:
+                continue
+            del self._pending[monitor_id]
+            track.confirmed_status = track.pending_status
+            if not track.flapping:
+                notify.append(track.change)
+            track.change = None
+            self._maybe_forget(monitor_id, track, now)
+
+        # 抖动分数回落后结束抖动状态，并通知当前的确认状态
+        for monitor_id, track in list(self._flapping.items()):
+            if monitor_id in changed_ids:
+                continue
+            if self._decayed_score(track, now) < self.flap_threshold * FLAP_REUSE_RATIO:
+                del self._flapping[monitor_id]
+                track.flapping = False
+                status = current_status(monitor_id)
+                if status is not None:
+                    notify.append({'id': monitor_id, 'name': track.name, 'old_status': None,
+                                   'new_status': track.confirmed_status, 'flap': 'end'})
+        return notify
+
+    def _maybe_forget(self, monitor_id: Any, track: _MonitorTrack, now: float):
+        """没有待确认变化、不在抖动中且分数可忽略的监控项不再单独跟踪"""
+        if monitor_id in self._pending or track.flapping:
+            return
+        if not self.flap_threshold or self._decayed_score(track, now) < 0.01:
+            del self._tracks[monitor_id]
+
+
+class IncidentCorrelator:
+    """将时间窗口内先后到达的状态变化合并为一次事件通知
+
+    第一条变化到达时开启窗口，窗口结束时把期间的所有变化一次性交给 emit；
+    window 为 0 时立即发出 (仍按每轮/每次推送合并)。
+    每条变化附带 detected_at (进入窗口的 time.monotonic())，供通知延迟统计包含窗口内的等待时间。
+    """
+
+    def __init__(self, emit: Callable[[List[Dict[str, Any]]], None], window: float = DEFAULT_INCIDENT_WINDOW):
+        self.emit = emit
+        self.window = max(0.0, window)
+        self._buffer: Dict[Any, Dict[str, Any]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, changes: List[Dict[str, Any]]):
+        if not changes:
+            return
+        now = time.monotonic()
+        for change in changes:
+            previous = self._buffer.get(change['id'])
+            change = {**change, 'detected_at': previous['detected_at'] if previous is not None else now}
+            if previous is not None and not change.get('flap') and not previous.get('flap'):
+                # 同一监控项在窗口内多次变化: 以首次的原状态和最新状态合并
+                change['old_status'] = previous['old_status']
+                if change['old_status'] == change['new_status']:
+                    del self._buffer[change['id']]
+                    continue
+            self._buffer[change['id']] = change
+        if not self.window:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        changes = list(self._buffer.values())
+        self._buffer.clear()
+        try:
+            self.emit(changes)
+        except Exception as e:
+            logger.error(f"发送事件通知时出错: {e}", exc_info=True)
@@ -0,0 +1,194 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+RESPONSE_CHUNK_SIZE = 64 * 1024  # 从连接读取响应体的块大小 (字节)
+# 响应体超过此大小才切换为增量解析；精简请求的单页响应远小于此值，整体 json.loads 更快且 dict 树很小
+STREAM_THRESHOLD = 256 * 1024
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_INCOMPLETE = object()  # 缓冲区中的值尚未完整到达
+
+
+class MonitorRecord:
+    """getMonitors 返回的单个监控项中插件实际使用的字段"""
+    __slots__ = ('id', 'friendly_name', 'status', 'average_response_time')
+
+    def __init__(self, id: Any, friendly_name: str, status: Any, average_response_time: Any = None):
+        self.id = id
+        self.friendly_name = friendly_name
+        self.status = status
+        self.average_response_time = average_response_time
+
+    @classmethod
+    def from_dict(cls, monitor: Dict[str, Any]) -> "MonitorRecord":
+        monitor_id = monitor.get('id')
+        return cls(monitor_id, monitor.get('friendly_name', f"ID: {monitor_id}"), monitor.get('status'),
+                   monitor.get('average_response_time'))
+
+    def __repr__(self) -> str:
+        return f"MonitorRecord(id={self.id!r}, friendly_name={self.friendly_name!r}, status={self.status!r})"
+
+
+class MonitorStreamDecoder:
+    """增量解析 API 响应体
+
+    响应体按块输入 (feed)，顶层字段 (stat、pagination、error 等) 照常解析；monitors 数组中的元素
+    每完整到达一个就转换为 MonitorRecord，原始 dict (含日志、响应时间等未使用的字段) 随即释放。
+    已解析的部分会从缓冲区丢弃，因此内存峰值只与单个监控项和块大小有关，而不是整个响应体。
+    累计不足 threshold 字节的响应体先缓存，结束时一次性解析。
+    """
+
+    def __init__(self, threshold: int = STREAM_THRESHOLD):
+        self.threshold = threshold
+        self._pending: List[bytes] = []  # 尚未开始增量解析时缓存的响应体
+        self._streaming = False
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'start'
+        self._key: Optional[str] = None
+        self._final = False
+        self.result: Dict[str, Any] = {}
+        self.monitors: Optional[List[MonitorRecord]] = None  # 响应中没有 monitors 时为 None
+        self.bytes_read = 0
+        self.head = b''  # 响应体开头，用于记录解析失败的响应
+
+    def feed(self, chunk: bytes):
+        self.bytes_read += len(chunk)
+        if len(self.head) < 500:
+            self.head += chunk[:500 - len(self.head)]
+        if not self._streaming:
+            self._pending.append(chunk)
+            if self.bytes_read <= self.threshold:
+                return
+            self._streaming = True
+            chunk = b''.join(self._pending)
+            self._pending = []
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        self._parse()
+
+    def close(self) -> Dict[str, Any]:
+        """输入结束，返回解析结果 (monitors 为 MonitorRecord 列表)；响应体不完整或无效时抛出 JSONDecodeError"""
+        if not self._streaming:
+            return self._decode_whole(b''.join(self._pending))
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(b'', final=True)
+        self._pos = 0
+        self._final = True
+        self._parse()
+        if self._state != 'end':
+            raise json.JSONDecodeError("响应体不完整", self._buffer, self._pos)
+        if self.monitors is not None:
+            self.result['monitors'] = self.monitors
+        return self.result
+
+    def _decode_whole(self, body: bytes) -> Dict[str, Any]:
+        text = body.decode('utf-8')
+        result = json.loads(text)
+        if not isinstance(result, dict):
+            raise json.JSONDecodeError("需要 '{'", text, 0)
+        monitors = result.get('monitors')
+        if isinstance(monitors, list):
+            result['monitors'] = [MonitorRecord.from_dict(monitor) for monitor in monitors
+                                  if isinstance(monitor, dict)]
+        return result
+
+    def _skip_whitespace(self) -> bool:
+        """跳过空白，返回缓冲区中是否还有字符"""
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _decode_value(self) -> Any:
+        """解析缓冲区当前位置的一个完整 JSON 值；数据尚未到齐时返回 _INCOMPLETE"""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if self._final:
+                raise
+            return _INCOMPLETE
+        # 数字等值可能在块边界被截断，后面出现分隔符才算完整
+        if not self._final and _WHITESPACE.match(self._buffer, end).end() >= len(self._buffer):
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+    def _expect(self, char: str):
+        if self._buffer[self._pos] != char:
+            raise json.JSONDecodeError(f"需要 '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def _parse(self):
+        while True:
+            if not self._skip_whitespace():
+                return
+            state = self._state
+            char = self._buffer[self._pos]
+            if state == 'start':
+                self._expect('{')
+                self._state = 'first_key'
+            elif state in ('first_key', 'key'):
+                if char == '}' and state == 'first_key':
+                    self._pos += 1
+                    self._state = 'end'
+                    continue
+                if char != '"':
+                    raise json.JSONDecodeError("需要字段名", self._buffer, self._pos)
+                key = self._decode_value()
+                if key is _INCOMPLETE:
+                    return
+                self._key = key
+                self._state = 'colon'
+            elif state == 'colon':
+                self._expect(':')
+                self._state = 'value'
+            elif state == 'value':
+                if self._key == 'monitors' and char == '[':
+                    self._pos += 1
+                    self.monitors = []
+                    self._state = 'first_item'
+                    continue
+                value = self._decode_value()
+                if value is _INCOMPLETE:
+                    return
+                self.result[self._key] = value
+                self._state = 'next_key'
+            elif state == 'next_key':
+                self._pos += 1
+                if char == ',':
+                    self._state = 'key'
+                elif char == '}':
+                    self._state = 'end'
+                else:
+                    raise json.JSONDecodeError("需要 ',' 或 '}'", self._buffer, self._pos - 1)
+            elif state in ('first_item', 'item'):
+                if char == ']' and state == 'first_item':
+                    self._pos += 1
+                    self._state = 'next_key'
+                    continue
+                monitor = self._decode_value()
+                if monitor is _INCOMPLETE:
+                    return
+                if isinstance(monitor, dict):
+                    self.monitors.append(MonitorRecord.from_dict(monitor))
+                self._state = 'next_item'
+            elif state == 'next_item':
+                self._pos += 1
+                if char == ',':
+                    self._state = 'item'
+                elif char == ']':
+                    self._state = 'next_key'
+                else:
+                    raise json.JSONDecodeError("需要 ',' 或 ']'", self._buffer, self._pos - 1)
+            else:  # end
+                raise json.JSONDecodeError("响应体末尾有多余内容", self._buffer, self._pos)
+
+
+def decode_monitors_response(body: bytes, chunk_size: int = RESPONSE_CHUNK_SIZE,
+                             threshold: int = STREAM_THRESHOLD) -> Dict[str, Any]:
+    """按块解析完整的响应体 (用于测试与基准)"""
+    decoder = MonitorStreamDecoder(threshold)
+    for start in range(0, len(body), chunk_size):
+        decoder.feed(body[start:start + chunk_size])
+    return decoder.close()
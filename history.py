@@ -0,0 +1,223 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from astrbot.api import logger
+
+DOWN_STATUS = 9  # 仅"宕机"计为不可用，"疑似宕机"不计入
+HOUR = 3600
+WINDOWS = (("24小时", 24 * HOUR), ("7天", 7 * 24 * HOUR), ("30天", 30 * 24 * HOUR))
+ROLLUP_RETENTION = 31 * 24 * HOUR  # 小时汇总只需覆盖最长统计窗口
+DEFAULT_RETENTION_DAYS = 90  # 原始状态变化记录的默认保留天数
+SAMPLE_RETENTION = 7 * 24 * HOUR  # 响应时间样本保留时长
+MAINTENANCE_INTERVAL = 6 * HOUR  # 清理与压缩的执行间隔
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS transitions (
+    account TEXT NOT NULL, monitor_id INTEGER NOT NULL, name TEXT,
+    ts REAL NOT NULL, old_status INTEGER, new_status INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_transitions_ts ON transitions (ts);
+CREATE INDEX IF NOT EXISTS idx_transitions_monitor ON transitions (account, monitor_id, ts);
+CREATE TABLE IF NOT EXISTS open_outages (
+    account TEXT NOT NULL, monitor_id INTEGER NOT NULL, started_at REAL NOT NULL,
+    PRIMARY KEY (account, monitor_id)
+);
+CREATE TABLE IF NOT EXISTS rollup_hourly (
+    account TEXT NOT NULL, monitor_id INTEGER NOT NULL, hour INTEGER NOT NULL,
+    down_seconds REAL NOT NULL DEFAULT 0, outages INTEGER NOT NULL DEFAULT 0,
+    recoveries INTEGER NOT NULL DEFAULT 0, recovery_seconds REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (account, monitor_id, hour)
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_hour ON rollup_hourly (hour);
+CREATE TABLE IF NOT EXISTS response_samples (
+    account TEXT NOT NULL, monitor_id INTEGER NOT NULL, ts REAL NOT NULL, response_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_ts ON response_samples (ts);
+"""
+
+
+class MonitorAggregate:
+    """单个监控项在一个统计窗口内的汇总"""
+    __slots__ = ('window', 'uptime', 'outages', 'mttr', 'down_seconds')
+
+    def __init__(self, window: str, uptime: float, outages: int, mttr: Optional[float], down_seconds: float):
+        self.window = window
+        self.uptime = uptime
+        self.outages = outages
+        self.mttr = mttr
+        self.down_seconds = down_seconds
+
+
+class HistoryStore:
+    """状态变化历史 (SQLite)
+
+    每次状态变化都会写入 transitions，并增量更新按小时汇总的 rollup_hourly
+    (宕机秒数、宕机次数、恢复次数与恢复耗时)，查询时只需对少量汇总行求和。
+    所有数据库操作在一个专用线程中串行执行，不阻塞事件循环。
+    """
+
+    def __init__(self, path: Path, retention_days: int = DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.retention = max(1, retention_days) * 24 * HOUR
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="uptimerobot-history")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._created_at = time.time()
+        self._last_maintenance = 0.0
+
+    # --- 以下方法只在专用线程中执行 ---
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path))
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'created_at'").fetchone()
+            if row:
+                self._created_at = float(row[0])
+            else:
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('created_at', ?)", (str(self._created_at),))
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _add_down_seconds(conn: sqlite3.Connection, account: str, monitor_id: Any, start: float, end: float):
+        """把 [start, end) 的宕机时长按小时拆分累加到汇总表"""
+        cursor = start
+        while cursor < end:
+            hour = int(cursor // HOUR)
+            slice_end = min(end, (hour + 1) * HOUR)
+            conn.execute(
+                "INSERT INTO rollup_hourly (account, monitor_id, hour, down_seconds) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (account, monitor_id, hour) DO UPDATE SET down_seconds = down_seconds + excluded.down_seconds",
+                (account, monitor_id, hour, slice_end - cursor))
+            cursor = slice_end
+
+    def _record_sync(self, account: str, changes: Sequence[Dict[str, Any]], samples: Sequence[Tuple[Any, float]],
+                     ts: float):
+        conn = self._connect()
+        with conn:
+            for change in changes:
+                monitor_id = change['id']
+                conn.execute(
+                    "INSERT INTO transitions (account, monitor_id, name, ts, old_status, new_status) VALUES (?, ?, ?, ?, ?, ?)",
+                    (account, monitor_id, change.get('name'), ts, change.get('old_status'), change.get('new_status')))
+                hour = int(ts // HOUR)
+                if change.get('new_status') == DOWN_STATUS:
+                    conn.execute("INSERT OR IGNORE INTO open_outages (account, monitor_id, started_at) VALUES (?, ?, ?)",
+                                 (account, monitor_id, ts))
+                    conn.execute(
+                        "INSERT INTO rollup_hourly (account, monitor_id, hour, outages) VALUES (?, ?, ?, 1) "
+                        "ON CONFLICT (account, monitor_id, hour) DO UPDATE SET outages = outages + 1",
+                        (account, monitor_id, hour))
+                elif change.get('old_status') == DOWN_STATUS:
+                    row = conn.execute("SELECT started_at FROM open_outages WHERE account = ? AND monitor_id = ?",
+                                       (account, monitor_id)).fetchone()
+                    if row is None:
+                        continue  # 宕机开始时间未知 (例如插件启动前已宕机)，无法计入时长
+                    started_at = row[0]
+                    conn.execute("DELETE FROM open_outages WHERE account = ? AND monitor_id = ?", (account, monitor_id))
+                    self._add_down_seconds(conn, account, monitor_id, started_at, ts)
+                    conn.execute(
+                        "INSERT INTO rollup_hourly (account, monitor_id, hour, recoveries, recovery_seconds) "
+                        "VALUES (?, ?, ?, 1, ?) ON CONFLICT (account, monitor_id, hour) DO UPDATE SET "
+                        "recoveries = recoveries + 1, recovery_seconds = recovery_seconds + excluded.recovery_seconds",
+                        (account, monitor_id, hour, ts - started_at))
+            if samples:
+                conn.executemany("INSERT INTO response_samples (account, monitor_id, ts, response_ms) VALUES (?, ?, ?, ?)",
+                                 [(account, monitor_id, ts, response_ms) for monitor_id, response_ms in samples])
+        if ts - self._last_maintenance >= MAINTENANCE_INTERVAL:
+            self._maintain_sync(ts)
+
+    def _maintain_sync(self, now: float):
+        """按保留期清理旧数据，并在删除较多时压缩数据库文件"""
+        conn = self._connect()
+        self._last_maintenance = now
+        with conn:
+            deleted = conn.execute("DELETE FROM transitions WHERE ts < ?", (now - self.retention,)).rowcount
+            deleted += conn.execute("DELETE FROM rollup_hourly WHERE hour < ?",
+                                    (int((now - ROLLUP_RETENTION) // HOUR),)).rowcount
+            deleted += conn.execute("DELETE FROM response_samples WHERE ts < ?", (now - SAMPLE_RETENTION,)).rowcount
+        if deleted > 10000:
+            conn.execute("VACUUM")
+        logger.debug(f"历史数据维护完成，清理了 {deleted} 行。")
+
+    def _query_sync(self, account: str, monitor_ids: Optional[Sequence[Any]], now: float,
+                    limit: Optional[int]) -> Dict[Any, List[MonitorAggregate]]:
+        conn = self._connect()
+        columns = []
+        params: List[Any] = []
+        for _, seconds in WINDOWS:
+            start_hour = int((now - seconds) // HOUR)
+            columns.append("SUM(CASE WHEN hour >= ? THEN down_seconds ELSE 0 END), "
+                           "SUM(CASE WHEN hour >= ? THEN outages ELSE 0 END), "
+                           "SUM(CASE WHEN hour >= ? THEN recoveries ELSE 0 END), "
+                           "SUM(CASE WHEN hour >= ? THEN recovery_seconds ELSE 0 END)")
+            params.extend([start_hour] * 4)
+        sql = f"SELECT monitor_id, {', '.join(columns)} FROM rollup_hourly WHERE account = ? AND hour >= ?"
+        params.extend([account, int((now - WINDOWS[-1][1]) // HOUR)])
+        if monitor_ids is not None:
+            sql += f" AND monitor_id IN ({', '.join('?' * len(monitor_ids))})"
+            params.extend(monitor_ids)
+        sql += " GROUP BY monitor_id"
+        rows = {row[0]: row[1:] for row in conn.execute(sql, params)}
+        open_outages = dict(conn.execute("SELECT monitor_id, started_at FROM open_outages WHERE account = ?",
+                                         (account,)).fetchall())
+
+        ids = list(monitor_ids) if monitor_ids is not None else list(set(rows) | set(open_outages))
+        observed_total = max(1.0, now - self._created_at)
+        result: Dict[Any, List[MonitorAggregate]] = {}
+        for monitor_id in ids:
+            values = rows.get(monitor_id, (0,) * (4 * len(WINDOWS)))
+            aggregates = []
+            for index, (label, seconds) in enumerate(WINDOWS):
+                down, outages, recoveries, recovery_seconds = (v or 0 for v in values[index * 4:index * 4 + 4])
+                started_at = open_outages.get(monitor_id)
+                if started_at is not None:  # 进行中的宕机按当前时间计入
+                    down += now - max(started_at, now - seconds)
+                observed = min(seconds, observed_total)
+                uptime = max(0.0, 1 - down / observed) * 100
+                mttr = recovery_seconds / recoveries if recoveries else None
+                aggregates.append(MonitorAggregate(label, uptime, int(outages), mttr, down))
+            result[monitor_id] = aggregates
+        if limit is not None and monitor_ids is None:
+            # 未指定监控项时，按最长窗口的可用率从低到高取前 limit 个
+            worst = sorted(result, key=lambda monitor_id: result[monitor_id][-1].uptime)[:limit]
+            result = {monitor_id: result[monitor_id] for monitor_id in worst}
+        return result
+
+    # --- 异步接口 ---
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def record(self, account: str, changes: Sequence[Dict[str, Any]],
+               samples: Iterable[Tuple[Any, float]] = (), ts: Optional[float] = None):
+        """提交一轮轮询的状态变化与响应时间样本，立即返回 (写入按提交顺序在后台完成)"""
+        samples = list(samples)
+        if not changes and not samples:
+            return
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._record_sync, account, list(changes), samples, ts or time.time())
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"写入状态变化历史失败: {future.exception()}", exc_info=future.exception())
+
+    async def query(self, account: str, monitor_ids: Optional[Sequence[Any]] = None,
+                    limit: Optional[int] = None) -> Dict[Any, List[MonitorAggregate]]:
+        """查询监控项在 24小时/7天/30天 窗口内的可用率、宕机次数与 MTTR"""
+        return await self._run(self._query_sync, account, monitor_ids, time.time(), limit)
+
+    async def close(self):
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        await self._run(_close)
+        self._executor.shutdown(wait=True)
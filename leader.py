@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from astrbot.api import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_LEASE_TTL = 30  # 主节点租约有效期 (秒)
+MIN_LEASE_TTL = 3
+LEASE_FILE_NAME = "poller.lease"
+
+
+def default_owner_id() -> str:
+    """实例标识: 主机名:进程号:随机后缀 (同一进程内重载插件也不会与旧实例混淆)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class _FileLock:
+    """跨进程互斥锁 (flock / msvcrt)，持有者退出时由操作系统自动释放"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        except BaseException:
+            os.close(self._fd)
+            self._fd = None
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class LeaseElection:
+    """基于共享数据目录中租约文件的主节点选举
+
+    租约文件记录持有者与到期时间 (墙上时间)，读取-判断-写入在文件锁内完成。
+    主节点每 ttl/3 续约一次；其他实例以相同间隔检查，租约过期后接管。
+    主节点异常退出时，其他实例最迟在 ttl + ttl/3 内接管；正常停止时主动释放租约，下次检查即接管。
+    无法续约的主节点在租约到期前主动降级，避免出现两个主节点。
+    """
+
+    def __init__(self, path: Path, ttl: float = DEFAULT_LEASE_TTL, owner_id: Optional[str] = None):
+        self.path = path
+        self.lock_path = path.with_name(path.name + '.lock')
+        self.ttl = max(MIN_LEASE_TTL, ttl)
+        self.owner_id = owner_id or default_owner_id()
+        self.is_leader = False
+        self.expires_at = 0.0  # 本实例持有的租约到期时间 (time.time())
+        self.holder: Optional[Dict[str, Any]] = None  # 最近一次读到的租约内容
+        self.transitions = 0
+
+    @property
+    def renew_interval(self) -> float:
+        return self.ttl / 3
+
+    def follows_active_leader(self) -> bool:
+        """最近一次读到的租约是否由其他实例持有且尚未过期"""
+        if self.is_leader or not self.holder or self.holder.get('owner') == self.owner_id:
+            return False
+        try:
+            return float(self.holder.get('expires_at', 0)) > time.time()
+        except (TypeError, ValueError):
+            return False
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lease = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"租约文件无法解析，视为无主: {e}")
+            return None
+        return lease if isinstance(lease, dict) else None
+
+    def _write(self, lease: Dict[str, Any]):
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(lease, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def try_acquire(self) -> bool:
+        """获取或续约租约 (阻塞，应在线程池中调用)，返回本实例是否持有租约"""
+        with _FileLock(self.lock_path):
+            now = time.time()
+            lease = self._read()
+            holder = lease.get('owner') if lease else None
+            try:
+                expired = lease is None or float(lease.get('expires_at', 0)) <= now
+            except (TypeError, ValueError):
+                expired = True
+            if holder != self.owner_id and not expired:
+                self.holder = lease
+                return False
+            acquired_at = lease.get('acquired_at', now) if holder == self.owner_id else now
+            lease = {'owner': self.owner_id, 'acquired_at': acquired_at, 'renewed_at': now,
+                     'expires_at': now + self.ttl}
+            self._write(lease)
+            self.holder = lease
+            self.expires_at = lease['expires_at']
+            return True
+
+    def release(self):
+        """释放本实例持有的租约 (阻塞，应在线程池中调用)"""
+        with _FileLock(self.lock_path):
+            lease = self._read()
+            if lease and lease.get('owner') == self.owner_id:
+                os.remove(self.path)
+        self.expires_at = 0.0
+
+    async def run(self, on_change: Callable[[bool], Awaitable[None]],
+                  on_follow: Optional[Callable[[], Awaitable[None]]] = None):
+        """选举循环，直到被取消: 角色变化时调用 on_change(是否为主节点)，作为从节点时每次检查后调用 on_follow"""
+        while True:
+            try:
+                leader = await asyncio.to_thread(self.try_acquire)
+            except Exception as e:
+                # 无法访问租约文件: 租约到期前保留角色，之后降级
+                logger.error(f"访问租约文件 {self.path} 失败: {e}")
+                leader = self.is_leader and time.time() + self.renew_interval < self.expires_at
+                if not leader:
+                    self.holder = None  # 无法确认当前主节点
+            if leader != self.is_leader:
+                self.is_leader = leader
+                self.transitions += 1
+                holder = self.holder.get('owner') if self.holder else None
+                logger.info(f"实例 {self.owner_id} 成为{'主节点' if leader else '从节点'}"
+                            + ("" if leader else f" (当前主节点: {holder or '未知'})") + "。")
+                try:
+                    await on_change(leader)
+                except Exception as e:
+                    logger.error(f"切换实例角色时出错: {e}", exc_info=True)
+            if not leader and on_follow is not None:
+                try:
+                    await on_follow()
+                except Exception as e:
+                    logger.error(f"同步主节点状态时出错: {e}", exc_info=True)
+            await asyncio.sleep(self.renew_interval)
@@ -4,12 +4,29 @@ from astrbot.api.star import Context, Star, register
 from astrbot.api import logger
 from astrbot.api.message_components import Plain  # 导入消息链和纯文本组件
 
-# 第三方库
-import requests
+from .accounts import MonitorAccount, build_accounts
+from .dampening import (DEFAULT_CONFIRM_OBSERVATIONS, DEFAULT_FLAP_HALF_LIFE, DEFAULT_FLAP_THRESHOLD,
+                        DEFAULT_INCIDENT_WINDOW, DEFAULT_STORM_THRESHOLD, IncidentCorrelator)
+from .decoding import RESPONSE_CHUNK_SIZE, MonitorRecord, MonitorStreamDecoder
+from .history import DEFAULT_RETENTION_DAYS, HistoryStore
+from .leader import DEFAULT_LEASE_TTL, LEASE_FILE_NAME, MIN_LEASE_TTL, LeaseElection
+from .metrics import PluginMetrics, start_metrics_server
+from .notifier import NotificationDispatcher
+from .scheduler import DEFAULT_RATE_LIMIT, MIN_POLLING_INTERVAL
+from .snapshot_cache import filter_monitors
+from .webhook import DEFAULT_WEBHOOK_HOST, DEFAULT_WEBHOOK_PATH, WebhookEvent, WebhookReceiver
+
+# 第三方库 (aiohttp 在首次发起请求时才导入，以加快插件加载)
+import functools
 import json
 import os
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union, AsyncIterator, Set, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+    import aiohttp.web
 
 # UptimeRobot 状态码到中文描述的映射
 STATUS_MAP = {
@@ -19,9 +36,52 @@ STATUS_MAP = {
     8: "疑似宕机",
     9: "宕机"
 }
+SUSPECT_STATUS = 8  # "疑似宕机"
 
 PLUGIN_NAME = "uptimerobot_monitor"
 
+UPTIMEROBOT_API_BASE = "https://api.uptimerobot.com/v2"
+
+# HTTP 客户端设置：分阶段超时 (连接 / 读取 / 总计) 与连接池
+HTTP_TIMEOUT_TOTAL = 15
+HTTP_TIMEOUT_CONNECT = 5
+HTTP_TIMEOUT_SOCK_READ = 10
+HTTP_POOL_LIMIT = 10  # 连接池最大连接数
+HTTP_KEEPALIVE_TIMEOUT = 60  # 空闲连接保持时间 (秒)
+
+MONITORS_PAGE_LIMIT = 50  # getMonitors 单页最大返回数量
+# getMonitors 的精简参数: 关闭日志、响应时间、告警联系人、SSL 等附加数据，只保留 id/status/friendly_name 等基本字段
+MINIMAL_MONITOR_PARAMS = {
+    'logs': '0',
+    'response_times': '0',
+    'alert_contacts': '0',
+    'ssl': '0',
+    'custom_http_headers': '0',
+    'custom_http_statuses': '0',
+    'mwindows': '0',
+    'timezone': '0',
+}
+DEFAULT_PAGINATION_CONCURRENCY = 3  # 并发拉取分页的默认上限
+DEFAULT_STATUS_CACHE_TTL = 90  # /uptime_status 快照的默认有效期 (秒)
+DEFAULT_SUSPECT_POLLING_INTERVAL = 20  # 存在疑似宕机监控项时的默认轮询间隔 (秒)
+HISTORY_MAX_MONITORS = 10  # /uptime_history 单次最多显示的监控项数
+DEFAULT_METRICS_HOST = "127.0.0.1"  # Prometheus 指标端点默认只监听本机
+DEFAULT_WEBHOOK_PORT = 8765  # Webhook 接收端默认端口
+DEFAULT_RECONCILE_INTERVAL = 300  # 启用 Webhook 后对账轮询的默认间隔 (秒)
+INCIDENT_MAX_NAMES = 10  # 事件摘要中每类最多列出的监控项名称数
+DOWN_STATUS = 9  # "宕机"
+UP_STATUS = 2  # "正常"
+STATUS_PAGE_SIZE = 50  # /uptime_status 每页显示的监控项数
+# /uptime_status 的状态过滤关键字 -> 状态码
+STATUS_FILTERS = {
+    'down': (DOWN_STATUS, SUSPECT_STATUS),
+    '宕机': (DOWN_STATUS, SUSPECT_STATUS),
+    'up': (UP_STATUS,),
+    '正常': (UP_STATUS,),
+    'paused': (0,),
+    '暂停': (0,),
+}
+
 
 @register(
     PLUGIN_NAME,  # 插件唯一名称
@@ -39,10 +99,21 @@ class UptimeRobotPlugin(Star):
         self.context = context
         self.polling_task: Optional[asyncio.Task] = None
         self.data_path: Optional[Path] = None
-        self.last_monitor_states_file: Optional[Path] = None
+        self.api_base_url = UPTIMEROBOT_API_BASE
+        self._http_session: Optional["aiohttp.ClientSession"] = None
+        self.metrics = PluginMetrics()
+        self.metrics.add_collector(self._collect_metrics)
+        self._metrics_runner: Optional["aiohttp.web.AppRunner"] = None
+        self._webhook: Optional[WebhookReceiver] = None
+        self.election: Optional[LeaseElection] = None  # 启用 leader_election 时的主节点选举
+        self._election_task: Optional[asyncio.Task] = None
+        self.notifier = NotificationDispatcher(context, metrics=self.metrics)
+        self.accounts: List[MonitorAccount] = []
+        self.history: Optional[HistoryStore] = None
 
-        # 获取插件专属配置
-        logger.info(f"插件配置加载: {self.plugin_config}")
+        # 获取插件专属配置 (仅记录键名，避免 API Key 泄露到日志)
+        if isinstance(self.plugin_config, dict):
+            logger.info(f"插件配置加载: {sorted(self.plugin_config.keys())}")
 
         # 设置数据目录 (保留回退逻辑)
         try:
@@ -56,14 +127,30 @@ class UptimeRobotPlugin(Star):
 
             if self.data_path:
                 self.data_path.mkdir(parents=True, exist_ok=True)  # 确保目录存在
-                self.last_monitor_states_file = self.data_path / "last_monitor_states.json"
-                logger.info(f"插件数据文件路径设置为: {self.last_monitor_states_file}")
+                logger.info(f"插件数据目录设置为: {self.data_path}")
             else:
                 logger.error("未能确定插件数据目录路径。")
 
         except Exception as e:
             logger.error(f"初始化数据目录时出错: {e}", exc_info=True)
 
+        # 构建账号列表 (顶层 api_key 为 default 账号，accounts 中为额外账号)
+        if isinstance(self.plugin_config, dict):
+            self.accounts = build_accounts(self.plugin_config, self.data_path,
+                                           status_cache_ttl=self._get_status_cache_ttl(),
+                                           rate_limit=self._get_api_rate_limit(),
+                                           metrics=self.metrics)
+        logger.info(f"已配置 {len(self.accounts)} 个 UptimeRobot 账号: {[account.name for account in self.accounts]}")
+        for account in self.accounts:
+            # 去抖后的变化先进入事件窗口，窗口结束时合并为一条通知
+            account.correlator = IncidentCorrelator(functools.partial(self._notify_incident, account))
+            self._configure_alerting(account, self.plugin_config)
+
+        # 状态变化历史 (SQLite，首次写入时才建立连接)
+        if self.data_path and self._get_config_bool('history_enabled', True):
+            self.history = HistoryStore(self.data_path / "history.sqlite3",
+                                        retention_days=self._get_history_retention_days())
+
         logger.info("UptimeRobot 插件初始化完成。")
 
     async def initialize(self):
@@ -73,80 +160,124 @@ class UptimeRobotPlugin(Star):
 
         # 注意：API Key 和其他配置的检查将在轮询循环内部或需要时进行
 
+        # 可选的本地 Prometheus 指标端点
+        await self._start_metrics_server()
+
+        # 多实例共享数据目录: 只有持有租约的主节点轮询、接收 Webhook 并发送通知
+        if self._get_config_bool('leader_election', False) and self.data_path:
+            self.election = LeaseElection(self.data_path / LEASE_FILE_NAME, ttl=self._get_lease_ttl())
+            self._election_task = asyncio.create_task(
+                self.election.run(self._on_leadership_change, on_follow=self._sync_from_leader))
+            logger.info(f"已启用主节点选举 (实例 {self.election.owner_id}，租约 {self.election.ttl:.0f} 秒)。")
+            return
+
+        # 可选的 Webhook 推送接收端 (启用后轮询降为低频对账)
+        await self._start_webhook_receiver()
+
         # 将轮询任务的启动移到方法末尾
+        self._start_polling()
+
+    def _start_polling(self):
         if self.polling_task is None or self.polling_task.done():
             self.polling_task = asyncio.create_task(self._polling_loop())
             logger.info("轮询任务已创建并启动。")
         else:
             logger.warning("轮询任务已在运行中，跳过重复创建。")
 
+    async def _stop_polling(self):
+        if self.polling_task and not self.polling_task.done():
+            logger.info("正在取消轮询任务...")
+            self.polling_task.cancel()
+            try:
+                await self.polling_task  # 等待任务实际完成取消
+                logger.info("轮询任务已成功取消。")
+            except asyncio.CancelledError:
+                logger.info("轮询任务取消确认。")  # 正常取消
+            except Exception as e:
+                logger.error(f"等待轮询任务取消时发生错误: {e}", exc_info=True)
+        else:
+            logger.info("轮询任务不存在或已完成，无需取消。")
+
     # --- 辅助函数将在后续步骤实现 ---
     def _get_status_description(self, status_code: int) -> str:
         """获取状态码的中文描述"""
         return STATUS_MAP.get(status_code, f"未知状态({status_code})")
 
-    def _read_last_states(self) -> Dict[str, Any]:
-        """读取上次保存的监控状态"""
-        if not self.last_monitor_states_file:
-            logger.error("上次状态文件路径未设置，无法读取。")
-            return {}
-        try:
-            if self.last_monitor_states_file.exists():
-                with open(self.last_monitor_states_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if not content:  # 处理空文件情况
-                        return {}
-                    return json.loads(content)
-            else:
-                logger.info("上次状态文件不存在，将返回空状态。")
-                return {}
-        except FileNotFoundError:
-            logger.info("上次状态文件不存在 (FileNotFoundError)。")
-            return {}
-        except json.JSONDecodeError as e:
-            logger.error(f"解析上次状态文件失败: {e}. 文件内容可能已损坏。", exc_info=True)
-            # 考虑在这里备份或删除损坏的文件
-            return {}
-        except Exception as e:
-            logger.error(f"读取上次状态文件时发生未知错误: {e}", exc_info=True)
-            return {}
+    def _get_http_session(self) -> "aiohttp.ClientSession":
+        """获取 (必要时创建) 共享的 HTTP 会话"""
+        if self._http_session is None or self._http_session.closed:
+            import aiohttp
 
-    def _write_current_states(self, states: Dict[str, Any]):
-        """将当前监控状态写入文件"""
-        if not self.last_monitor_states_file:
-            logger.error("上次状态文件路径未设置，无法写入。")
-            return
-        try:
-            with open(self.last_monitor_states_file, 'w', encoding='utf-8') as f:
-                json.dump(states, f, ensure_ascii=False, indent=4)
-            # logger.debug(f"当前状态已成功写入: {self.last_monitor_states_file}") # 调试时可取消注释
-        except IOError as e:
-            logger.error(f"写入当前状态文件时发生 IO 错误: {e}", exc_info=True)
-        except TypeError as e:
-            logger.error(f"序列化当前状态为 JSON 时发生类型错误: {e}", exc_info=True)
-        except Exception as e:
-            logger.error(f"写入当前状态文件时发生未知错误: {e}", exc_info=True)
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300,
+            )
+            self._http_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_TOTAL, connect=HTTP_TIMEOUT_CONNECT,
+                                              sock_connect=HTTP_TIMEOUT_CONNECT, sock_read=HTTP_TIMEOUT_SOCK_READ),
+                headers={"Accept-Encoding": "gzip, deflate", "Cache-Control": "no-cache"},
+            )
+            logger.debug("已创建 UptimeRobot HTTP 会话。")
+        return self._http_session
 
-    async def _call_uptimerobot_api(self, method: str, data: dict = None) -> Dict[str, Any]:
-        """调用 UptimeRobot API"""
-        # --- 从 self.plugin_config 获取插件配置 ---
-        plugin_config = self.plugin_config  # 使用实例变量
-        logger.info(f"读取到的插件配置 (_call_uptimerobot_api): {plugin_config}")  # 添加日志
+    async def _close_http_session(self):
+        """关闭共享的 HTTP 会话"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+            logger.info("HTTP 会话已关闭。")
+        self._http_session = None
 
-        if not plugin_config or not isinstance(plugin_config, dict):
-            logger.error("插件配置未加载或类型无效，无法调用 API。")
-            print("PRINT 插件配置未加载或类型无效，无法调用 API。")  # 添加 print
-            return {"stat": "fail", "error": {"message": "Plugin configuration not loaded or invalid type"}}
+    @staticmethod
+    def _apply_rate_limit_headers(account: MonitorAccount, headers):
+        """根据响应头中的剩余配额收紧本地速率预算"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None:
+            try:
+                account.rate_limiter.sync_remaining(int(remaining))
+            except ValueError:
+                pass
 
-        api_key = plugin_config.get('api_key')
-        if not api_key or not isinstance(api_key, str) or not api_key.strip():
+    @staticmethod
+    def _parse_retry_after(headers) -> float:
+        """解析限流响应要求的等待时间 (秒)，缺省为 60 秒"""
+        for header in ('Retry-After', 'X-RateLimit-Reset'):
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                seconds = float(value)
+            except ValueError:
+                continue
+            if seconds > 10 ** 9:  # 以 Unix 时间戳表示的重置时间
+                seconds -= time.time()
+            return max(1.0, seconds)
+        return 60.0
+
+    async def _call_uptimerobot_api(self, method: str, data: dict = None,
+                                    account: Optional[MonitorAccount] = None) -> Dict[str, Any]:
+        """调用 UptimeRobot API (未指定账号时使用第一个账号)，并按 error.type 统计失败次数"""
+        result = await self._request_uptimerobot_api(method, data, account)
+        self.metrics.inc('uptimerobot_api_requests_total', method=method)
+        if result.get('stat') != 'ok':
+            error_type = (result.get('error') or {}).get('type') or 'api_error'
+            self.metrics.inc('uptimerobot_api_errors_total', method=method, type=error_type)
+        return result
+
+    async def _request_uptimerobot_api(self, method: str, data: Optional[dict],
+                                       account: Optional[MonitorAccount]) -> Dict[str, Any]:
+        if account is None:
+            account = self.accounts[0] if self.accounts else None
+        if account is None:
             logger.error("API Key 未在插件配置中设置、为空或类型错误，无法调用 UptimeRobot API。请检查插件配置。")
-            print(
-                "PRINT API Key 未在插件配置中设置、为空或类型错误，无法调用 UptimeRobot API。请检查插件配置。")  # 添加 print
-            return {"stat": "fail", "error": {"message": "API Key not configured correctly in plugin"}}
-        # --- 配置检查结束 ---
+            return {"stat": "fail", "error": {"type": "not_configured",
+                                              "message": "API Key not configured correctly in plugin"}}
+        api_key = account.api_key
 
-        api_url = f"https://api.uptimerobot.com/v2/{method}"
+        import aiohttp
+
+        api_url = f"{self.api_base_url}/{method}"
         payload = {
             'api_key': api_key,
             'format': 'json'
@@ -154,44 +285,269 @@ class UptimeRobotPlugin(Star):
         if data:
             payload.update(data)
 
-        try:
-            # 使用 asyncio.to_thread 在异步环境中运行同步的 requests 代码
-            # 设置合理的超时时间，例如 15 秒
-            response = await asyncio.to_thread(
-                requests.post, api_url, data=payload, timeout=15
-            )
+        # 同一 API Key 的所有调用 (轮询、分页、用户指令) 共享同一个速率预算，预算不足时在此等待
+        wait_started_at = time.perf_counter()
+        await account.rate_limiter.acquire()
+        request_started_at = time.perf_counter()
+        self.metrics.observe('uptimerobot_rate_limit_wait_seconds', request_started_at - wait_started_at)
 
-            response.raise_for_status()  # 对 >= 400 的状态码抛出 HTTPError
+        decoder = MonitorStreamDecoder()
+        parse_seconds = 0.0
+        try:
+            # 复用长期会话中的连接，避免每次调用都重新握手
+            session = self._get_http_session()
+            async with session.post(api_url, data=payload) as response:
+                self._apply_rate_limit_headers(account, response.headers)
+                if response.status == 429:
+                    retry_after = self._parse_retry_after(response.headers)
+                    account.rate_limiter.penalize(retry_after)
+                    return {"stat": "fail", "error": {"type": "rate_limited", "retry_after": retry_after,
+                                                      "message": f"Rate limited, retry after {retry_after:.0f}s"}}
+                response.raise_for_status()  # 对 >= 400 的状态码抛出 ClientResponseError
+                # 边接收边解析: 监控项逐个转换为精简记录，不在内存中保留完整的响应体与 dict 树
+                async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_SIZE):
+                    parse_started_at = time.perf_counter()
+                    decoder.feed(chunk)
+                    parse_seconds += time.perf_counter() - parse_started_at
+                # Content-Length 为实际传输 (gzip 时为压缩后) 的大小；分块传输时没有该头，只能按解压后的大小估算
+                wire_bytes = response.content_length
 
-            json_response = response.json()
+            parse_started_at = time.perf_counter()
+            json_response = decoder.close()
+            parse_ms = (parse_seconds + time.perf_counter() - parse_started_at) * 1000
 
             # 检查 UptimeRobot API 返回的业务状态
             if json_response.get('stat') == 'fail':
                 error_message = json_response.get('error', {}).get('message', 'Unknown API error')
-                logger.error(f"UptimeRobot API 调用失败 ({method}): {error_message} | 请求数据: {data}")
+                logger.error(f"UptimeRobot API 调用失败 ({method}, 账号 {account.name}): {error_message} | 请求数据: {data}")
                 return json_response  # 返回包含错误信息的原始响应
 
-            # logger.debug(f"UptimeRobot API 调用成功 ({method}).") # 调试时可取消注释
+            # 附带传输统计，供轮询汇总每轮的流量与解析耗时
+            json_response['_stats'] = {'wire_bytes': wire_bytes if wire_bytes is not None else decoder.bytes_read,
+                                       'wire_estimated': wire_bytes is None, 'body_bytes': decoder.bytes_read,
+                                       'parse_ms': parse_ms}
             return json_response
 
-        except requests.exceptions.Timeout:
+        except asyncio.TimeoutError:
             logger.error(f"调用 UptimeRobot API ({method}) 超时。 URL: {api_url}")
             return {"stat": "fail", "error": {"type": "timeout", "message": "Request timed out"}}
-        except requests.exceptions.RequestException as e:
+        except aiohttp.ClientError as e:
             logger.error(f"调用 UptimeRobot API ({method}) 时发生网络错误: {e}", exc_info=True)
             return {"stat": "fail", "error": {"type": "network_error", "message": str(e)}}
         except json.JSONDecodeError as e:
-            logger.error(f"解析 UptimeRobot API ({method}) 响应 JSON 时失败: {e}. 响应内容: {response.text[:500]}",
+            logger.error(f"解析 UptimeRobot API ({method}) 响应 JSON 时失败: {e}. 响应内容: {decoder.head!r}",
                          exc_info=True)
             return {"stat": "fail", "error": {"type": "json_decode_error", "message": "Failed to decode API response"}}
         except Exception as e:
             logger.error(f"调用 UptimeRobot API ({method}) 时发生未知错误: {e}", exc_info=True)
             return {"stat": "fail", "error": {"type": "unknown", "message": str(e)}}
+        finally:
+            self.metrics.observe('uptimerobot_api_request_seconds', time.perf_counter() - request_started_at,
+                                 method=method)
+
+    def _get_config_bool(self, key: str, default: bool) -> bool:
+        """读取布尔配置项"""
+        if not isinstance(self.plugin_config, dict):
+            return default
+        return bool(self.plugin_config.get(key, default))
+
+    def _get_config_int(self, key: str, default: int, minimum: Optional[int] = None) -> int:
+        """读取整数配置项，无效时使用默认值"""
+        try:
+            value = int(self.plugin_config.get(key, default))
+        except (ValueError, TypeError, AttributeError):
+            value = default
+        return value if minimum is None else max(minimum, value)
+
+    def _get_lease_ttl(self) -> int:
+        """读取主节点租约有效期"""
+        return self._get_config_int('leader_lease_ttl', DEFAULT_LEASE_TTL, minimum=MIN_LEASE_TTL)
+
+    def _is_warm_start_enabled(self) -> bool:
+        """是否启用热启动 (默认启用)"""
+        return self._get_config_bool('warm_start', True)
+
+    def _get_history_retention_days(self) -> int:
+        """读取状态变化历史的保留天数"""
+        return self._get_config_int('history_retention_days', DEFAULT_RETENTION_DAYS, minimum=1)
+
+    def _get_status_cache_ttl(self) -> int:
+        """读取 /uptime_status 快照有效期配置"""
+        return self._get_config_int('status_cache_ttl', DEFAULT_STATUS_CACHE_TTL, minimum=0)
+
+    def _get_api_rate_limit(self) -> int:
+        """读取每个 API Key 的速率预算 (次/分钟)"""
+        return self._get_config_int('api_rate_limit', DEFAULT_RATE_LIMIT, minimum=1)
+
+    def _get_pagination_concurrency(self) -> int:
+        """读取分页并发上限配置"""
+        return self._get_config_int('pagination_concurrency', DEFAULT_PAGINATION_CONCURRENCY, minimum=1)
+
+    def _get_metrics_port(self) -> int:
+        """读取 Prometheus 指标端点端口，0 表示不启用"""
+        port = self._get_config_int('metrics_port', 0)
+        return port if 0 < port < 65536 else 0
+
+    # --- 运行指标 ---
+    async def _start_metrics_server(self):
+        """配置了 metrics_port 时启动本地 Prometheus 指标端点"""
+        port = self._get_metrics_port()
+        if not port or self._metrics_runner is not None:
+            return
+        host = self.plugin_config.get('metrics_host') or DEFAULT_METRICS_HOST
+        try:
+            self._metrics_runner = await start_metrics_server(self.metrics, host, port)
+        except Exception as e:
+            logger.error(f"启动 Prometheus 指标端点 ({host}:{port}) 失败: {e}", exc_info=True)
+
+    def _collect_metrics(self):
+        """刷新 gauge 类指标 (在渲染指标前调用)"""
+        self.metrics.set_gauge('uptimerobot_notification_queue_depth', self.notifier.queue_depth)
+        self.metrics.set_gauge('uptimerobot_leader', 1 if self.election is None or self.election.is_leader else 0)
+        for account in self.accounts:
+            self.metrics.set_gauge('uptimerobot_poll_interval_seconds', account.scheduler.effective_interval,
+                                   account=account.name)
+            self.metrics.set_gauge('uptimerobot_rate_limit_remaining', account.rate_limiter.remaining,
+                                   account=account.name)
+            self.metrics.set_gauge('uptimerobot_monitors', len(account.state_store), account=account.name)
+            self.metrics.set_gauge('uptimerobot_pending_confirmations', account.dampener.pending_count,
+                                   account=account.name)
+            self.metrics.set_gauge('uptimerobot_flapping_monitors', len(account.dampener.flapping_ids),
+                                   account=account.name)
+
+    @staticmethod
+    def _format_latency(histogram) -> str:
+        """将耗时直方图格式化为 '平均/p50/p95/最大' (毫秒)"""
+        if histogram is None or not histogram.count:
+            return "暂无数据"
+        return (f"平均 {histogram.mean * 1000:.1f}ms，p50 {histogram.quantile(0.5) * 1000:.1f}ms，"
+                f"p95 {histogram.quantile(0.95) * 1000:.1f}ms，最大 {histogram.max * 1000:.1f}ms")
+
+    @staticmethod
+    def _format_poll_traffic(stats: Dict[str, Any]) -> str:
+        """将一轮轮询的流量与解析耗时格式化为文本 (无 Content-Length 的响应单独注明为估算值)"""
+        text = f"接收 {stats['wire_bytes'] / 1024:.1f} KiB"
+        if stats['estimated_wire_bytes']:
+            text += f" + 估算 {stats['estimated_wire_bytes'] / 1024:.1f} KiB (无 Content-Length，按解压后大小计)"
+        return f"{text} (解压后 {stats['body_bytes'] / 1024:.1f} KiB)，JSON 解析 {stats['parse_ms']:.2f} ms"
+
+    def _format_metrics_report(self) -> str:
+        """生成 /uptime_metrics 的文本报告"""
+        metrics = self.metrics
+        metrics.collect()
+        lines = [f"【UptimeRobot 插件指标】(已运行 {self._format_duration(time.time() - metrics.started_at)})"]
+        if self.election is not None:
+            holder = self.election.holder.get('owner') if self.election.holder else None
+            lines.append(f"实例角色: {'主节点' if self.election.is_leader else '从节点'} ({self.election.owner_id})，"
+                         f"当前主节点 {holder or '未知'}，角色切换 {self.election.transitions} 次")
+
+        requests = sum(metrics.counter_series('uptimerobot_api_requests_total').values())
+        errors: Dict[str, float] = {}
+        for labels, count in metrics.counter_series('uptimerobot_api_errors_total').items():
+            error_type = dict(labels).get('type', 'unknown')
+            errors[error_type] = errors.get(error_type, 0) + count
+        line = f"API 调用: {requests:.0f} 次，失败 {sum(errors.values()):.0f} 次"
+        if errors:
+            line += " (" + "，".join(f"{error_type}×{count:.0f}"
+                                    for error_type, count in sorted(errors.items(), key=lambda item: -item[1])) + ")"
+        lines.append(line)
+        lines.append(f"API 耗时: {self._format_latency(metrics.merged_histogram('uptimerobot_api_request_seconds'))}")
+        lines.append(f"速率预算等待: {self._format_latency(metrics.merged_histogram('uptimerobot_rate_limit_wait_seconds'))}")
+
+        for account in self.accounts:
+            poll_histogram = metrics.histogram('uptimerobot_poll_duration_seconds', account=account.name)
+            polls = poll_histogram.count if poll_histogram else 0
+            failures = metrics.counter('uptimerobot_poll_failures_total', account=account.name)
+            lines.append(f"[账号: {account.name}] 轮询 {polls} 次 (失败 {failures:.0f} 次)，"
+                         f"监控项 {len(account.state_store)} 个，当前间隔 {account.scheduler.effective_interval:.0f} 秒，"
+                         f"剩余预算 {account.rate_limiter.remaining:.1f}")
+            lines.append(f"  轮询耗时: {self._format_latency(poll_histogram)}")
+            drift = metrics.histogram('uptimerobot_poll_drift_seconds', account=account.name)
+            lines.append(f"  调度漂移: {self._format_latency(drift)}")
+            if account.last_poll_stats:
+                lines.append(f"  上次轮询 ({account.last_poll_stats['mode']}): {account.last_poll_stats['requests']} 个请求，"
+                             f"{self._format_poll_traffic(account.last_poll_stats)}")
+            parse_histogram = metrics.histogram('uptimerobot_poll_parse_seconds', account=account.name)
+            lines.append(f"  JSON 解析: {self._format_latency(parse_histogram)}")
+            cache_stats = account.snapshot_cache.stats()
+            lines.append(f"  状态快照: 命中 {cache_stats['hits']}，未命中 {cache_stats['misses']}，"
+                         f"合并 {cache_stats['coalesced']}")
+
+        lines.append(f"通知: 已发送 {self.notifier.sent}，失败 {self.notifier.failed}，"
+                     f"队列中 {self.notifier.queue_depth}")
+        lines.append(f"  发送耗时: {self._format_latency(metrics.histogram('uptimerobot_notification_send_seconds'))}")
+        lines.append(f"  通知延迟 (自检测到变化): {self._format_latency(metrics.histogram('uptimerobot_notification_lag_seconds'))}")
+        write_histogram = metrics.histogram('uptimerobot_state_write_seconds')
+        lines.append(f"状态文件写入: {write_histogram.count if write_histogram else 0} 次，"
+                     f"{self._format_latency(write_histogram)}")
+        if self._webhook is not None:
+            webhook_results = {dict(labels).get('result'): count for labels, count
+                               in metrics.counter_series('uptimerobot_webhook_events_total').items()}
+            lines.append("Webhook: " + ("，".join(f"{result} {count:.0f}" for result, count in
+                                                 sorted(webhook_results.items())) or "尚未收到推送"))
+        if self._metrics_runner is not None:
+            lines.append(f"Prometheus 端点: http://{self.plugin_config.get('metrics_host') or DEFAULT_METRICS_HOST}:"
+                         f"{self._get_metrics_port()}/metrics")
+        return "\n".join(lines)
+
+    async def _iter_monitor_pages(self, account: MonitorAccount,
+                                  params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """分页获取 getMonitors，每页到达后立即产出
+
+        先请求首页以读取 pagination.total，其余页在并发上限内并行请求，
+        按完成顺序产出。失败页会以 stat=fail 的响应产出，由调用方决定如何处理。
+        默认只请求比较所需的最小字段集，params 可覆盖或追加过滤条件。
+        """
+        base_params = {**MINIMAL_MONITOR_PARAMS, **(params or {})}
+        first_page = await self._call_uptimerobot_api(
+            'getMonitors', {**base_params, 'offset': '0', 'limit': str(MONITORS_PAGE_LIMIT)}, account)
+        yield first_page
+        if first_page.get('stat') != 'ok':
+            return
+
+        pagination = first_page.get('pagination') or {}
+        try:
+            total = int(pagination.get('total', 0))
+            limit = int(pagination.get('limit', MONITORS_PAGE_LIMIT)) or MONITORS_PAGE_LIMIT
+        except (ValueError, TypeError):
+            logger.warning(f"getMonitors 返回的分页信息无效: {pagination}，仅使用首页数据。")
+            return
+        if total <= limit:
+            return
+
+        semaphore = asyncio.Semaphore(self._get_pagination_concurrency())
+
+        async def fetch_page(offset: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._call_uptimerobot_api(
+                    'getMonitors', {**base_params, 'offset': str(offset), 'limit': str(limit)}, account)
+
+        tasks = [asyncio.create_task(fetch_page(offset)) for offset in range(limit, total, limit)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                yield await next_page
+        finally:
+            # 调用方提前退出或任务被取消时，清理尚未完成的请求
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_all_monitors(self, account: MonitorAccount) -> Tuple[List[MonitorRecord], Optional[str]]:
+        """获取账号的全部监控项 (按分页顺序合并)，返回 (监控项列表, 错误信息)"""
+        pages: List[Tuple[int, List[MonitorRecord]]] = []
+        error_msg = None
+        async for page in self._iter_monitor_pages(account):
+            if page.get('stat') != 'ok':
+                error_msg = page.get('error', {}).get('message', '未知 API 错误')
+                continue
+            offset = int((page.get('pagination') or {}).get('offset', 0) or 0)
+            pages.append((offset, page.get('monitors', [])))
+        pages.sort(key=lambda item: item[0])
+        return [monitor for _, page_monitors in pages for monitor in page_monitors], error_msg
 
     # --- 指令处理函数 ---
     @filter.command("uptime_status")
-    async def uptime_status(self, event: AstrMessageEvent):
-        """获取并显示当前 UptimeRobot 监控状态"""
+    async def uptime_status(self, event: AstrMessageEvent, account_name: str = ""):
+        """获取并显示当前 UptimeRobot 监控状态，支持按账号、状态 (down/up/paused) 与名称筛选及分页 (page N)"""
         # --- 从 self.plugin_config 获取插件配置 ---
         plugin_config = self.plugin_config  # 使用实例变量
         if not plugin_config or not isinstance(plugin_config, dict):
@@ -199,44 +555,199 @@ class UptimeRobotPlugin(Star):
             logger.error("无法获取插件配置 (uptime_status)，self.plugin_config 无效或未加载。")
             return
 
-        api_key = plugin_config.get('api_key')
-        if not api_key or not isinstance(api_key, str) or not api_key.strip():
+        if not self.accounts:
             yield event.plain_result("错误：UptimeRobot API Key 未在插件配置中正确设置。请在 AstrBot UI 中配置。")
             logger.error("未找到或无效的 API Key (uptime_status)，请检查 self.plugin_config。")
             return
         # --- 配置检查结束 ---
 
+        account_names, statuses, name_query, page = self._parse_status_query(
+            getattr(event, 'message_str', '') or account_name)
+        accounts = self.accounts
+        if account_names:
+            accounts = [account for account in self.accounts if account.name in account_names]
+
         logger.info(f"收到用户 {event.get_sender_name()} 的 /uptime_status 请求。")
-        # API 调用会自动检查 api_key (通过 _call_uptimerobot_api 内部的逻辑)
-        api_response = await self._call_uptimerobot_api('getMonitors')
+        # 优先使用轮询循环维护的快照；过期时并发请求合并为一次 API 拉取，各账号并发获取
+        results = await asyncio.gather(*(
+            account.snapshot_cache.get(functools.partial(self._fetch_all_monitors, account))
+            for account in accounts))
 
-        if api_response.get('stat') == 'fail':
-            error_msg = api_response.get('error', {}).get('message', '未知 API 错误')
-            logger.error(f"获取监控状态失败: {error_msg}")
-            yield event.plain_result(f"获取监控状态失败: {error_msg}。请检查日志或 API Key。")
-            return
+        if len(accounts) == 1:
+            monitors, error_msg = results[0]
+            if error_msg and not monitors:
+                logger.error(f"获取监控状态失败: {error_msg}")
+                yield event.plain_result(f"获取监控状态失败: {error_msg}。请检查日志或 API Key。")
+                return
 
-        monitors = api_response.get('monitors', [])
-        if not monitors:
+        if not any(monitors for monitors, _ in results):
             yield event.plain_result("当前没有配置任何 UptimeRobot 监控项，或 API 返回为空。")
             return
 
-        status_lines = ["【当前 UptimeRobot 监控状态】"]
-        for monitor in monitors:
-            monitor_name = monitor.get('friendly_name', f"ID: {monitor.get('id', '未知')}")
-            status_code = monitor.get('status')
-            status_desc = self._get_status_description(status_code)
-            status_lines.append(f"- {monitor_name}: {status_desc}")
+        # 快照有效时直接查索引；拉取出错时返回的是部分或过期列表，线性过滤
+        matches = []
+        total = 0
+        for account, (monitors, error_msg) in zip(accounts, results):
+            logger.debug(f"账号 {account.name} 状态快照统计: {account.snapshot_cache.stats()}")
+            total += len(monitors)
+            if error_msg:
+                found = filter_monitors(monitors, statuses, name_query)
+            else:
+                found = account.snapshot_cache.query(statuses, name_query)
+            matches.extend((account, monitor) for monitor in found)
 
-        total_monitors = api_response.get('pagination', {}).get('total', len(monitors))
-        limit = api_response.get('pagination', {}).get('limit', 50)  # API 默认 limit 是 50
-        if total_monitors > limit:
-            status_lines.append(f"\n(注意: API 默认最多返回 {limit} 个监控项，总共有 {total_monitors} 个)")
+        page_count = max(1, -(-len(matches) // STATUS_PAGE_SIZE))
+        page = min(page, page_count)
+        page_matches = matches[(page - 1) * STATUS_PAGE_SIZE:page * STATUS_PAGE_SIZE]
+
+        filtered = statuses is not None or bool(name_query)
+        status_lines = ["【当前 UptimeRobot 监控状态】"]
+        if filtered:
+            status_lines.append(f"匹配 {len(matches)} / {total} 个监控项")
+        if page_count > 1:
+            status_lines.append(f"第 {page}/{page_count} 页 (每页 {STATUS_PAGE_SIZE} 个)")
+        show_account = len(self.accounts) > 1
+        shown_account = None
+        for account, (monitors, error_msg) in zip(accounts, results):
+            if error_msg and not monitors:
+                logger.error(f"获取账号 {account.name} 的监控状态失败: {error_msg}")
+                if show_account:
+                    status_lines.append(f"[账号: {account.name}]")
+                status_lines.append(f"获取监控状态失败: {error_msg}")
+        for account, monitor in page_matches:
+            if show_account and account is not shown_account:
+                status_lines.append(f"[账号: {account.name}]")
+                shown_account = account
+            status_lines.append(account.snapshot_cache.render_line(monitor, self._format_status_line))
+        if not matches:
+            status_lines.append("没有符合条件的监控项。")
+        for account, (monitors, error_msg) in zip(accounts, results):
+            if error_msg and monitors:
+                prefix = f"账号 {account.name} " if show_account else ""
+                status_lines.append(f"(注意: {prefix}获取最新状态失败，列表可能不完整或已过期: {error_msg})")
+        if page < page_count:
+            status_lines.append(f"发送 /uptime_status {self._status_query_args(account_names, statuses, name_query)}"
+                                f"page {page + 1} 查看下一页")
 
         output_message = "\n".join(status_lines)
         yield event.plain_result(output_message)
         logger.info(f"已向用户 {event.get_sender_name()} 回复监控状态。")
 
+    def _format_status_line(self, monitor: MonitorRecord) -> str:
+        return f"- {monitor.friendly_name}: {self._get_status_description(monitor.status)}"
+
+    def _parse_status_query(self, text: str) -> Tuple[List[str], Optional[Set[int]], str, int]:
+        """解析 /uptime_status 的参数: 账号名称、状态关键字、page N，其余部分作为名称关键字
+
+        返回 (账号名称列表, 状态码集合或 None, 名称关键字, 页码)。
+        """
+        tokens = text.split()
+        if tokens and tokens[0].lstrip('/').lower() == 'uptime_status':
+            tokens = tokens[1:]
+        account_names = {account.name for account in self.accounts}
+        selected_accounts: List[str] = []
+        statuses: Optional[Set[int]] = None
+        name_tokens: List[str] = []
+        page = 1
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            keyword = token.lower()
+            if keyword in ('page', '页', '-p') and index + 1 < len(tokens) and tokens[index + 1].isdigit():
+                page = max(1, int(tokens[index + 1]))
+                index += 2
+                continue
+            if keyword in STATUS_FILTERS:
+                statuses = (statuses or set()) | set(STATUS_FILTERS[keyword])
+            elif token in account_names:
+                selected_accounts.append(token)
+            else:
+                name_tokens.append(token)
+            index += 1
+        return selected_accounts, statuses, " ".join(name_tokens), page
+
+    @staticmethod
+    def _status_query_args(account_names: List[str], statuses: Optional[Set[int]], name_query: str) -> str:
+        """还原筛选参数，用于提示翻页指令"""
+        args = list(account_names)
+        if statuses is not None:
+            args.extend(keyword for keyword, codes in STATUS_FILTERS.items()
+                        if keyword.isascii() and statuses.issuperset(codes))
+        if name_query:
+            args.append(name_query)
+        return "".join(f"{arg} " for arg in args)
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        """将秒数格式化为易读的时长"""
+        seconds = int(seconds)
+        days, rest = divmod(seconds, 86400)
+        hours, rest = divmod(rest, 3600)
+        minutes, secs = divmod(rest, 60)
+        if days:
+            return f"{days}天{hours}小时"
+        if hours:
+            return f"{hours}小时{minutes}分"
+        if minutes:
+            return f"{minutes}分{secs}秒"
+        return f"{secs}秒"
+
+    @filter.command("uptime_history")
+    async def uptime_history(self, event: AstrMessageEvent, keyword: str = ""):
+        """显示监控项最近 24小时/7天/30天 的可用率、宕机次数与平均恢复时间 (MTTR)"""
+        if self.history is None:
+            yield event.plain_result("状态变化历史未启用 (history_enabled)，无法统计可用率。")
+            return
+        if not self.accounts:
+            yield event.plain_result("错误：UptimeRobot API Key 未在插件配置中正确设置。请在 AstrBot UI 中配置。")
+            return
+
+        logger.info(f"收到用户 {event.get_sender_name()} 的 /uptime_history 请求。")
+        keyword_lower = keyword.lower()
+        status_lines = ["【UptimeRobot 可用性统计】"]
+        show_account = len(self.accounts) > 1
+        found = False
+        for account in self.accounts:
+            if keyword:
+                # 按名称匹配内存中的监控项 (不区分大小写)，最多显示 HISTORY_MAX_MONITORS 个
+                monitor_ids = [monitor_id for monitor_id, (_, name) in account.state_store.items()
+                               if keyword_lower in str(name).lower()][:HISTORY_MAX_MONITORS]
+                if not monitor_ids:
+                    continue
+                aggregates = await self.history.query(account.name, monitor_ids)
+            else:
+                # 未指定关键字时只显示可用率最低的监控项
+                aggregates = await self.history.query(account.name, limit=HISTORY_MAX_MONITORS)
+            if not aggregates:
+                continue
+            found = True
+            if show_account:
+                status_lines.append(f"[账号: {account.name}]")
+            for monitor_id, windows in aggregates.items():
+                monitor_name = account.state_store.get_name(monitor_id) or f"ID: {monitor_id}"
+                status_lines.append(f"- {monitor_name}")
+                for aggregate in windows:
+                    line = f"  {aggregate.window}: {aggregate.uptime:.2f}%"
+                    if aggregate.outages:
+                        line += f"，宕机 {aggregate.outages} 次"
+                    if aggregate.mttr is not None:
+                        line += f"，MTTR {self._format_duration(aggregate.mttr)}"
+                    status_lines.append(line)
+
+        if not found:
+            if keyword:
+                yield event.plain_result(f"未找到名称包含 '{keyword}' 的监控项。")
+            else:
+                yield event.plain_result("最近 30 天内没有记录到宕机。")
+            return
+        yield event.plain_result("\n".join(status_lines))
+
+    @filter.command("uptime_metrics")
+    async def uptime_metrics(self, event: AstrMessageEvent):
+        """显示插件运行指标: API 耗时与错误、轮询耗时与调度漂移、通知队列与状态文件写入"""
+        logger.info(f"收到用户 {event.get_sender_name()} 的 /uptime_metrics 请求。")
+        yield event.plain_result(self._format_metrics_report())
+
     @filter.command("test_push")
     async def test_push(self, event: AstrMessageEvent):
         """测试向当前会话主动发送消息"""
@@ -259,179 +770,473 @@ class UptimeRobotPlugin(Star):
             yield event.plain_result(f"尝试向您的会话 ({sender_session_id}) 发送测试消息时遇到错误，请检查日志。")
 
     # --- 后台轮询任务 ---
+    def _compare_monitor_page(self, account: MonitorAccount, monitors: List[MonitorRecord],
+                              report_changes: bool = True) -> List[Dict[str, Any]]:
+        """将一页监控项与账号内存中的上次状态比较并更新索引，返回状态发生变化的监控项"""
+        changed_monitors = []
+        state_store = account.state_store
+        for monitor in monitors:
+            monitor_id = monitor.id
+            if monitor_id is None:
+                logger.warning(f"发现一个没有 ID 的监控项: {monitor}")
+                continue
+
+            current_status = monitor.status
+            monitor_name = monitor.friendly_name
+
+            last_status = state_store.update(monitor_id, current_status, monitor_name)
+            if not report_changes:
+                continue
+            if current_status is not None and last_status is not None and current_status != last_status:
+                logger.info(
+                    f"检测到状态变化: 账号 {account.name} 的监控项 '{monitor_name}' (ID: {monitor_id}) 从 {last_status} 变为 {current_status}")
+                changed_monitors.append({
+                    'id': monitor_id,
+                    'name': monitor_name,
+                    'old_status': last_status,
+                    'new_status': current_status
+                })
+        return changed_monitors
+
+    def _format_change_digest(self, changed_monitors: List[Dict[str, Any]],
+                              account: Optional[MonitorAccount] = None) -> str:
+        """将一轮轮询中的所有状态变化格式化为一条通知消息 (多账号时注明账号)"""
+        def describe(change: Dict[str, Any]) -> str:
+            new_status_desc = self._get_status_description(change['new_status'])
+            if change.get('flap') == 'start':
+                return f"状态频繁变化 (当前: {new_status_desc})，暂停该监控项的逐条通知"
+            if change.get('flap') == 'end':
+                return f"状态已稳定，当前: {new_status_desc}"
+            old_status_desc = self._get_status_description(change['old_status'])
+            return f"{old_status_desc} -> {new_status_desc}"
+
+        title = "【UptimeRobot 状态变更】"
+        if account is not None and len(self.accounts) > 1:
+            title += f"[账号: {account.name}]"
+        offline_note = "\n(该变化发生在插件离线期间)"
+        if len(changed_monitors) == 1:
+            change = changed_monitors[0]
+            notify_message = f"{title}\n监控项: {change['name']}\n状态: {describe(change)}"
+            if change.get('while_offline'):
+                notify_message += offline_note
+            return notify_message
+
+        lines = [f"{title}共 {len(changed_monitors)} 项"]
+        lines.extend(f"- {change['name']}: {describe(change)}" for change in changed_monitors)
+        if any(change.get('while_offline') for change in changed_monitors):
+            lines.append(offline_note.strip())
+        return "\n".join(lines)
+
+    def _format_incident_summary(self, changes: List[Dict[str, Any]], account: Optional[MonitorAccount] = None) -> str:
+        """大量监控项同时变化时只发送事件摘要: 按新状态分组计数，每组列出部分名称"""
+        title = "【UptimeRobot 故障事件】"
+        if account is not None and len(self.accounts) > 1:
+            title += f"[账号: {account.name}]"
+        groups: Dict[str, List[str]] = {}
+        flapping = []
+        for change in changes:
+            if change.get('flap') == 'start':
+                flapping.append(change['name'])
+                continue
+            if change['new_status'] == DOWN_STATUS:
+                label = "宕机"
+            elif change['new_status'] == UP_STATUS:
+                label = "恢复"
+            else:
+                label = self._get_status_description(change['new_status'])
+            groups.setdefault(label, []).append(change['name'])
+
+        lines = [f"{title}共 {len(changes)} 个监控项的状态在短时间内发生变化"]
+        for label, names in sorted(groups.items(), key=lambda item: -len(item[1])):
+            shown = "、".join(str(name) for name in names[:INCIDENT_MAX_NAMES])
+            more = f" 等 {len(names)} 个" if len(names) > INCIDENT_MAX_NAMES else ""
+            lines.append(f"- {label} {len(names)} 个: {shown}{more}")
+        if flapping:
+            lines.append(f"- 状态频繁变化、已暂停逐条通知 {len(flapping)} 个: "
+                         f"{'、'.join(str(name) for name in flapping[:INCIDENT_MAX_NAMES])}")
+        if any(change.get('while_offline') for change in changes):
+            lines.append("(部分变化发生在插件离线期间)")
+        return "\n".join(lines)
+
+    def _get_polling_interval(self, plugin_config: dict, override: Optional[int] = None) -> int:
+        """读取轮询间隔配置 (每次循环都读，允许动态修改)；override 为账号单独设置的间隔"""
+        raw_interval = override if override is not None else plugin_config.get('polling_interval', 60)
+        try:
+            polling_interval = int(raw_interval)
+        except (ValueError, TypeError):
+            logger.warning(f"配置中的 polling_interval 值无效，使用默认值 60。原始值: {raw_interval}")
+            polling_interval = 60
+        if polling_interval < MIN_POLLING_INTERVAL:
+            logger.warning(f"配置的 polling_interval ({polling_interval}) 小于最小值 {MIN_POLLING_INTERVAL}，将使用 {MIN_POLLING_INTERVAL}。")
+            polling_interval = MIN_POLLING_INTERVAL
+        return polling_interval
+
+    def _configure_scheduler(self, account: MonitorAccount, plugin_config: dict):
+        """将配置中的间隔与速率预算同步到账号的调度器"""
+        polling_interval = self._get_polling_interval(plugin_config, account.polling_interval)
+        if self._webhook is not None:
+            # 状态变化由 Webhook 实时推送，轮询只作为低频对账，补齐漏推的告警与监控项列表的变化
+            polling_interval = max(polling_interval, self._get_reconcile_interval())
+        try:
+            suspect_interval = int(plugin_config.get('suspect_polling_interval', DEFAULT_SUSPECT_POLLING_INTERVAL))
+        except (ValueError, TypeError):
+            suspect_interval = DEFAULT_SUSPECT_POLLING_INTERVAL
+        account.rate_limiter.configure(self._get_api_rate_limit())
+        account.scheduler.configure(polling_interval, suspect_interval)
+
     async def _polling_loop(self):
-        """后台轮询检查状态变化"""
+        """后台轮询检查状态变化: 各账号的轮询管线并发运行，互不影响"""
         logger.info("轮询循环已启动。")
-        # +++ Simplified initial call +++
-        logger.info("尝试获取一次初始监控状态...")
-        initial_response = await self._call_uptimerobot_api('getMonitors')
-        if initial_response.get('stat') == 'ok':
-            self._write_current_states(initial_response)
-            logger.info("初始监控状态获取成功并已保存。")
+        if not self.accounts:
+            logger.warning("未配置任何 UptimeRobot 账号 (api_key / accounts)，轮询未启动。保存配置后插件重载即可生效。")
+            return
+        # 热启动: 载入上次持久化的快照，首次轮询直接与之比较，从而补报插件离线期间的状态变化。
+        # 未启用时不载入快照，首次轮询结果仅作为基线。两种情况都不会在进入循环前阻塞于网络请求。
+        # 启用主节点选举时总是载入: 共享状态由上一任主节点维护，接管后继续比较，不会漏报交接期间的变化。
+        warm_start = self._is_warm_start_enabled()
+        if warm_start or self.election is not None:
+            await asyncio.gather(*(asyncio.to_thread(account.state_store.load) for account in self.accounts))
+            for account in self.accounts:
+                account.warm_start_pending = warm_start and len(account.state_store) > 0
+                logger.info(f"{'热启动' if warm_start else '接管'}: 账号 {account.name} 已载入 "
+                            f"{len(account.state_store)} 个监控项的上次状态。")
         else:
-            error_msg = initial_response.get('error', {}).get('message', '未知 API 错误')
-            logger.error(f"获取初始监控状态失败: {error_msg}")
-        # +++ End Simplified initial call +++
+            logger.info("未启用热启动，首次轮询结果将仅作为比较基线。")
 
-        # 初始等待一个较短时间，以防配置尚未完全就绪
-        # await asyncio.sleep(5) # Removed initial sleep
+        await asyncio.gather(*(self._account_polling_loop(account) for account in self.accounts))
+        logger.info("轮询循环已结束。")
 
+    async def _account_polling_loop(self, account: MonitorAccount):
+        """单个账号的轮询循环，异常只影响该账号"""
         while True:
-            polling_interval = 60  # 默认间隔，如果配置读取失败则使用
-            plugin_config = None  # 重置配置变量
-            api_key = None  # 重置 api_key
-            notification_targets = []  # 重置通知目标
-
+            # 间隔从本轮开始时计算，轮询耗时不会累积为漂移
+            cycle_started_at = time.monotonic()
             try:
-                logger.debug("执行一次轮询检查...")
+                logger.debug(f"执行一次轮询检查 (账号 {account.name})...")
                 # --- 从 self.plugin_config 获取插件配置 ---
                 plugin_config = self.plugin_config  # 使用实例变量
-                logger.info(f"轮询循环 - 读取到的插件配置: {plugin_config}")  # 添加日志
 
                 if not plugin_config or not isinstance(plugin_config, dict):
                     logger.warning("无法加载插件配置或配置类型错误，跳过本次轮询。将使用默认间隔。")
-                    print("PRINT 无法加载插件配置或配置类型错误，跳过本次轮询。将使用默认间隔。")  # 添加 print
-                    await asyncio.sleep(polling_interval)  # 使用默认间隔
-                    continue
-
-                api_key = plugin_config.get('api_key')
-                if not api_key or not isinstance(api_key, str) or not api_key.strip():
-                    logger.warning("API Key 未在插件配置中正确设置，跳过本次轮询。")
-                    print("PRINT API Key 未在插件配置中正确设置，跳过本次轮询。")  # 添加 print
-                    # 尝试读取轮询间隔用于休眠
-                    try:
-                        polling_interval = int(plugin_config.get('polling_interval', 60))
-                    except (ValueError, TypeError):
-                        polling_interval = 60
-                    if polling_interval < 10: polling_interval = 10
-                    await asyncio.sleep(polling_interval)
-                    continue
-
-                # 读取当前轮询间隔 (每次循环都读，允许动态修改)
-                try:
-                    polling_interval = int(plugin_config.get('polling_interval', 60))
-                except (ValueError, TypeError):
-                    logger.warning(
-                        f"配置中的 polling_interval 值无效，使用默认值 60。原始值: {plugin_config.get('polling_interval')}")
-                    polling_interval = 60
-                if polling_interval < 10:
-                    logger.warning(f"配置的 polling_interval ({polling_interval}) 小于最小值 10，将使用 10。")
-                    polling_interval = 10
-                # --- 配置读取结束 ---
-
-                # 获取当前状态 (API 调用会使用检查过的 api_key)
-                current_response = await self._call_uptimerobot_api(
-                    'getMonitors')  # _call_uptimerobot_api 内部会用 plugin_config 里的 api_key
-                if current_response.get('stat') != 'ok':
-                    error_msg = current_response.get('error', {}).get('message', '未知 API 错误')
-                    logger.error(f"轮询时获取监控状态失败: {error_msg}")
-                    # 出错时也等待，使用已读取的 polling_interval
-                    await asyncio.sleep(polling_interval)
-                    continue
-
-                # 获取上次状态
-                last_states_data = self._read_last_states()
-                last_monitors_dict = {m['id']: m for m in last_states_data.get('monitors', []) if 'id' in m}
-
-                # 状态比较
-                current_monitors = current_response.get('monitors', [])
-                changed_monitors = []
-                # current_states_dict = {} # 不再需要在循环外定义
-
-                for monitor in current_monitors:
-                    monitor_id = monitor.get('id')
-                    if monitor_id is None:
-                        logger.warning(f"发现一个没有 ID 的监控项: {monitor}")
-                        continue
-
-                    # current_states_dict[monitor_id] = monitor # 不再需要存储整个状态
-                    current_status = monitor.get('status')
-                    monitor_name = monitor.get('friendly_name', f"ID: {monitor_id}")
-
-                    last_monitor = last_monitors_dict.get(monitor_id)
-                    if last_monitor:
-                        last_status = last_monitor.get('status')
-                        if current_status is not None and last_status is not None and current_status != last_status:
-                            logger.info(
-                                f"检测到状态变化: 监控项 '{monitor_name}' (ID: {monitor_id}) 从 {last_status} 变为 {current_status}")
-                            changed_monitors.append({
-                                'id': monitor_id,
-                                'name': monitor_name,
-                                'old_status': last_status,
-                                'new_status': current_status
-                            })
-
-                # 发送通知
-                if changed_monitors:
-                    # --- 从 plugin_config 获取通知目标 ---
-                    targets_from_config = plugin_config.get('notification_targets', [])
-                    if isinstance(targets_from_config, list):
-                        # 过滤并转换为字符串
-                        notification_targets = [str(t).strip() for t in targets_from_config if
-                                                isinstance(t, (str, int)) and str(t).strip()]
-                        # 移除空字符串目标
-                        notification_targets = [t for t in notification_targets if t]
-                    else:
-                        logger.warning(
-                            f"配置中的 notification_targets 不是列表 (类型: {type(targets_from_config)})，本次不发送通知。")
-                        notification_targets = []  # 确保为空列表
-                    # --- 配置获取结束 ---
-
-                    if notification_targets:
-                        logger.info(
-                            f"准备向 {len(notification_targets)} 个目标发送 {len(changed_monitors)} 条状态变更通知。")
-                        for change in changed_monitors:
-                            old_status_desc = self._get_status_description(change['old_status'])
-                            new_status_desc = self._get_status_description(change['new_status'])
-                            notify_message = f"【UptimeRobot 状态变更】\n监控项: {change['name']}\n状态: {old_status_desc} -> {new_status_desc}"
-                            message_list = [Plain(text=notify_message)]
-
-                            for target_session_id in notification_targets:
-                                # --- 添加目标格式验证 ---
-                                if target_session_id.count(':') != 2:
-                                    logger.warning(f"无效的通知目标格式: '{target_session_id}'。期望格式为 '平台:类型:ID' (例如 'qq:private:123' 或 'qq:group:456')。已跳过此目标。")
-                                    continue
-                                # --- 格式验证结束 ---
-                                try:
-                                    sent = await self.context.send_message(target_session_id, message_list)
-                                    if sent:
-                                        logger.info(f"已成功向 {target_session_id} 发送通知: {change['name']}")
-                                    else:
-                                        logger.warning(f"发送通知到 {target_session_id} 失败 (平台不支持或未找到会话)。")
-                                except Exception as send_error:
-                                    logger.error(f"向 {target_session_id} 发送通知时出错: {send_error}", exc_info=True)
-                    else:
-                        logger.info("检测到状态变化，但未配置通知目标 (notification_targets)，不发送通知。")
-
-                # 保存当前状态 (无论是否变化都要保存最新状态)
-                self._write_current_states(current_response)
+                else:
+                    self._configure_scheduler(account, plugin_config)
+                    self._configure_alerting(account, plugin_config)
+                    poll_started_at = time.perf_counter()
+                    await self._poll_once(account, plugin_config)
+                    self.metrics.observe('uptimerobot_poll_duration_seconds', time.perf_counter() - poll_started_at,
+                                         account=account.name)
+                    if account.scheduler.consecutive_failures:
+                        self.metrics.inc('uptimerobot_poll_failures_total', account=account.name)
 
             except asyncio.CancelledError:
-                logger.info("轮询任务被取消。")
+                logger.info(f"账号 {account.name} 的轮询任务被取消。")
                 break
             except Exception as e:
-                logger.error(f"轮询循环中发生未捕获的错误: {e}", exc_info=True)
-                # 避免因为未知错误导致CPU占用过高，增加短暂休眠
-                await asyncio.sleep(5)
-            finally:
-                # 确保即使出错也有休眠，防止CPU空转
-                # 使用在 try 块开始时获取的 polling_interval (或默认值)
-                # logger.debug(f"轮询结束，等待 {polling_interval} 秒...") # 调试时可取消注释
-                await asyncio.sleep(polling_interval)
-        logger.info("轮询循环已结束。")
+                logger.error(f"账号 {account.name} 的轮询循环中发生未捕获的错误: {e}", exc_info=True)
+                account.scheduler.record_failure()
+                self.metrics.inc('uptimerobot_poll_failures_total', account=account.name)
+
+            delay = account.scheduler.next_delay(cycle_started_at)
+            logger.debug(f"账号 {account.name} 下次轮询将在 {delay:.1f} 秒后进行 "
+                         f"(有效间隔 {account.scheduler.effective_interval:.0f} 秒，"
+                         f"剩余请求预算 {account.rate_limiter.remaining:.1f})。")
+            planned_start = time.monotonic() + delay
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                logger.info(f"账号 {account.name} 的轮询任务被取消。")
+                break
+            # 事件循环繁忙时实际唤醒会晚于计划时间
+            self.metrics.observe('uptimerobot_poll_drift_seconds', max(0.0, time.monotonic() - planned_start),
+                                 account=account.name)
+
+    async def _poll_once(self, account: MonitorAccount, plugin_config: dict):
+        """对一个账号执行一次轮询: 分页获取、比较、通知、持久化，并把结果反馈给调度器
+
+        存在疑似宕机的监控项时，两次完整轮询之间只用 monitors 过滤条件复查这些监控项。
+        """
+        poll_started_at = time.monotonic()
+        suspect_recheck = (0 < len(account.suspect_ids) <= MONITORS_PAGE_LIMIT
+                           and poll_started_at - account.last_full_sweep_at < account.scheduler.base_interval)
+        # 分页获取当前状态，每页到达后立即与内存中的上次状态比较
+        changed_monitors = []
+        seen_ids = set()
+        suspect_ids = set()
+        fetch_error = None
+        retry_after = None
+        requests_used = 0
+        wire_bytes = estimated_wire_bytes = body_bytes = 0
+        parse_ms = 0.0
+        response_samples = []
+        collect_samples = self.history is not None and self._get_config_bool('history_response_times', False)
+        params: Dict[str, Any] = {}
+        if collect_samples:
+            # 需要响应时间样本时只请求最近一次的平均响应时间
+            params.update({'response_times': '1', 'response_times_limit': '1'})
+        if suspect_recheck:
+            params['monitors'] = '-'.join(str(monitor_id) for monitor_id in sorted(account.suspect_ids))
+        async for page in self._iter_monitor_pages(account, params):
+            requests_used += 1
+            page_stats = page.pop('_stats', None)
+            if page_stats:
+                if page_stats['wire_estimated']:
+                    estimated_wire_bytes += page_stats['wire_bytes']
+                else:
+                    wire_bytes += page_stats['wire_bytes']
+                body_bytes += page_stats['body_bytes']
+                parse_ms += page_stats['parse_ms']
+            if page.get('stat') != 'ok':
+                error = page.get('error', {})
+                fetch_error = error.get('message', '未知 API 错误')
+                if error.get('type') == 'rate_limited':
+                    retry_after = error.get('retry_after')
+                logger.error(f"轮询时获取账号 {account.name} 的监控分页失败: {fetch_error}")
+                continue
+            page_monitors = page.get('monitors', [])
+            if account.pushed_at:
+                # 本轮开始后已由 Webhook 更新的监控项以推送为准，避免较旧的轮询结果覆盖并误报
+                changed_monitors.extend(self._compare_monitor_page(account, [
+                    monitor for monitor in page_monitors
+                    if account.pushed_at.get(monitor.id, 0.0) < poll_started_at]))
+            else:
+                changed_monitors.extend(self._compare_monitor_page(account, page_monitors))
+            for monitor in page_monitors:
+                if monitor.id is not None:
+                    seen_ids.add(monitor.id)
+                    if monitor.status == SUSPECT_STATUS:
+                        suspect_ids.add(monitor.id)
+                    if collect_samples and monitor.average_response_time:
+                        try:
+                            response_samples.append((monitor.id, float(monitor.average_response_time)))
+                        except (ValueError, TypeError):
+                            pass
+
+        account.last_poll_stats = {
+            'mode': 'suspect_recheck' if suspect_recheck else 'full',
+            'requests': requests_used,
+            'monitors': len(seen_ids),
+            'wire_bytes': wire_bytes,
+            'estimated_wire_bytes': estimated_wire_bytes,
+            'body_bytes': body_bytes,
+            'parse_ms': parse_ms,
+        }
+        self.metrics.inc('uptimerobot_poll_bytes_total', wire_bytes, account=account.name, kind='wire')
+        if estimated_wire_bytes:
+            self.metrics.inc('uptimerobot_poll_bytes_total', estimated_wire_bytes, account=account.name,
+                             kind='wire_estimated')
+        self.metrics.inc('uptimerobot_poll_bytes_total', body_bytes, account=account.name, kind='decoded')
+        self.metrics.observe('uptimerobot_poll_parse_seconds', parse_ms / 1000, account=account.name)
+        logger.debug(f"账号 {account.name} 本轮轮询 ({account.last_poll_stats['mode']}): {requests_used} 个请求，"
+                     f"{len(seen_ids)} 个监控项，{self._format_poll_traffic(account.last_poll_stats)}。")
+
+        if fetch_error and not seen_ids:
+            logger.error(f"轮询时获取账号 {account.name} 的监控状态失败: {fetch_error}")
+            account.scheduler.record_failure(retry_after)
+            return
+
+        if account.warm_start_pending:
+            # 热启动后的首次成功轮询: 这些变化发生在插件离线期间
+            account.warm_start_pending = False
+            for change in changed_monitors:
+                change['while_offline'] = True
+            if changed_monitors:
+                logger.info(f"热启动: 账号 {account.name} 检测到 {len(changed_monitors)} 个插件离线期间发生的状态变化。")
+
+        self._dispatch_changes(account, changed_monitors, plugin_config, seen_ids, response_samples)
+
+        # 持久化当前状态 (仅在有变化时于后台写盘)
+        state_store = account.state_store
+        if suspect_recheck:
+            # 复查只覆盖疑似宕机的监控项: 更新疑似集合，不清理、不刷新快照
+            account.suspect_ids = (account.suspect_ids - seen_ids) | suspect_ids
+        elif not fetch_error:
+            account.suspect_ids = suspect_ids
+            account.last_full_sweep_at = poll_started_at
+            # 本轮开始前的推送记录已被完整轮询覆盖
+            account.pushed_at = {monitor_id: pushed_at for monitor_id, pushed_at in account.pushed_at.items()
+                                 if pushed_at >= poll_started_at}
+            # 只有完整获取时才清理已删除的监控项；部分分页失败时保留其上次状态，避免下次漏报
+            state_store.prune(seen_ids)
+            # 刷新 /uptime_status 使用的快照: 已与状态索引同步过时只应用此后累积的变化
+            changed_ids = state_store.take_changed()
+            if account.snapshot_cache.store_synced:
+                account.snapshot_cache.sync_changes(changed_ids, state_store.get)
+            else:
+                account.snapshot_cache.sync(state_store.items())
+        else:
+            account.suspect_ids |= suspect_ids
+        state_store.schedule_flush()
+
+        if fetch_error:
+            account.scheduler.record_failure(retry_after)
+        else:
+            # 速率预算按完整轮询的请求数估算
+            account.scheduler.record_success(has_suspect=bool(account.suspect_ids),
+                                             requests_used=None if suspect_recheck else requests_used)
+            if account.suspect_ids:
+                logger.info(f"账号 {account.name} 有 {len(account.suspect_ids)} 个监控项处于疑似宕机状态，"
+                            f"轮询间隔缩短为 {account.scheduler.effective_interval:.0f} 秒，期间只复查这些监控项。")
+
+    def _dispatch_changes(self, account: MonitorAccount, changed_monitors: List[Dict[str, Any]], plugin_config: dict,
+                          observed, response_samples=(), ts: Optional[float] = None):
+        """处理一批原始状态变化 (轮询与 Webhook 共用)
+
+        历史记录保存全部原始变化；通知先经过去抖与抖动抑制，再进入事件窗口合并。
+        observed 为本次实际观察到的监控项 ID，用于累计待确认变化的连续观察次数。
+        """
+        if changed_monitors:
+            self.metrics.inc('uptimerobot_status_changes_total', len(changed_monitors), account=account.name)
+        account.correlator.add(account.dampener.process(changed_monitors, observed, account.state_store.get_status))
+
+        # 记录状态变化历史与响应时间样本 (后台写入)
+        if self.history is not None:
+            self.history.record(account.name, changed_monitors, response_samples, ts=ts)
+
+    def _notify_incident(self, account: MonitorAccount, changes: List[Dict[str, Any]]):
+        """事件窗口结束时调用: 将窗口内的变化汇总为一条通知交给分发器"""
+        if account.notification_targets is not None:
+            notification_targets = account.notification_targets
+        else:
+            notification_targets = self.notifier.update_targets(self.plugin_config.get('notification_targets', []))
+        if not notification_targets:
+            logger.info("检测到状态变化，但未配置通知目标 (notification_targets)，不发送通知。")
+            return
+        if len(changes) >= self._get_config_int('storm_threshold', DEFAULT_STORM_THRESHOLD, minimum=2):
+            message = self._format_incident_summary(changes, account)
+        else:
+            message = self._format_change_digest(changes, account)
+        logger.info(f"准备向 {len(notification_targets)} 个目标发送 {len(changes)} 条状态变更的汇总通知。")
+        # 通知延迟从最早的变化进入事件窗口时算起，而不是从入队时算起
+        self.notifier.submit(message, notification_targets,
+                             detected_at=min(change['detected_at'] for change in changes))
+
+    def _configure_alerting(self, account: MonitorAccount, plugin_config: dict):
+        """将去抖、抖动检测与事件窗口的配置同步到账号"""
+        if not isinstance(plugin_config, dict):
+            return
+        try:
+            flap_threshold = float(plugin_config.get('flap_threshold', DEFAULT_FLAP_THRESHOLD))
+        except (ValueError, TypeError):
+            flap_threshold = DEFAULT_FLAP_THRESHOLD
+        account.dampener.configure(
+            self._get_config_int('alert_confirm_polls', DEFAULT_CONFIRM_OBSERVATIONS, minimum=1),
+            flap_threshold,
+            self._get_config_int('flap_half_life', DEFAULT_FLAP_HALF_LIFE, minimum=1))
+        account.correlator.window = self._get_config_int('incident_window', DEFAULT_INCIDENT_WINDOW, minimum=0)
+
+    # --- Webhook 推送 ---
+    async def _start_webhook_receiver(self):
+        """启用 webhook_enabled 时启动告警联系人 Webhook 接收端"""
+        if not self._get_config_bool('webhook_enabled', False) or self._webhook is not None:
+            return
+        secret = str(self.plugin_config.get('webhook_secret') or '').strip()
+        if not secret:
+            logger.error("已启用 Webhook 推送，但未设置 webhook_secret，出于安全考虑不启动接收端。")
+            return
+        port = self._get_config_int('webhook_port', DEFAULT_WEBHOOK_PORT)
+        receiver = WebhookReceiver(
+            self._handle_webhook_event, secret,
+            host=self.plugin_config.get('webhook_host') or DEFAULT_WEBHOOK_HOST,
+            port=port,
+            path=self.plugin_config.get('webhook_path') or DEFAULT_WEBHOOK_PATH,
+            on_result=lambda result: self.metrics.inc('uptimerobot_webhook_events_total', result=result))
+        try:
+            await receiver.start()
+        except Exception as e:
+            logger.error(f"启动 Webhook 接收端失败: {e}", exc_info=True)
+            return
+        self._webhook = receiver
+
+    def _get_reconcile_interval(self) -> int:
+        """读取启用 Webhook 后的对账轮询间隔"""
+        return self._get_config_int('reconcile_interval', DEFAULT_RECONCILE_INTERVAL, minimum=MIN_POLLING_INTERVAL)
+
+    async def _handle_webhook_event(self, event: WebhookEvent) -> bool:
+        """将一条 Webhook 告警按与轮询相同的方式比较、通知与持久化，返回是否产生了状态变化"""
+        if event.account:
+            account = next((account for account in self.accounts if account.name == event.account), None)
+        else:
+            account = self.accounts[0] if self.accounts else None
+        if account is None:
+            logger.warning(f"收到未知账号 '{event.account}' 的 Webhook 告警，已忽略。")
+            return False
+
+        monitor_id = event.monitor_id
+        monitor_name = event.friendly_name or account.state_store.get_name(monitor_id) or f"ID: {monitor_id}"
+        logger.debug(f"收到 Webhook 告警: 账号 {account.name} 的监控项 '{monitor_name}' 状态为 {event.status}。")
+        account.pushed_at[monitor_id] = time.monotonic()
+        changed_monitors = self._compare_monitor_page(account, [MonitorRecord(monitor_id, monitor_name, event.status)])
+        account.suspect_ids.discard(monitor_id)
+        account.snapshot_cache.patch(monitor_id, event.status, monitor_name)
+        self._dispatch_changes(account, changed_monitors, self.plugin_config, {monitor_id}, ts=event.alert_time)
+        account.state_store.schedule_flush()
+        return bool(changed_monitors)
+
+    # --- 多实例协调 ---
+    async def _on_leadership_change(self, leader: bool):
+        """成为主节点时开始轮询与接收 Webhook；失去租约时立即停止，避免与新主节点重复通知"""
+        if leader:
+            await self._start_webhook_receiver()
+            self._start_polling()
+            return
+        await self._stop_polling()
+        if self._webhook is not None:
+            await self._webhook.stop()
+            self._webhook = None
+        # 等待已开始的后台写盘结束，之后状态文件归新主节点所有，不再写入本实例的变更
+        await asyncio.gather(*(account.state_store.wait_flushed() for account in self.accounts))
+        for account in self.accounts:
+            account.correlator.flush()  # 已确认的变化仍然发出
+
+    async def _sync_from_leader(self):
+        """从节点: 主节点写入状态文件后重新载入，作为 /uptime_status 的快照
+
+        其他实例持有未过期的租约说明它仍在轮询，因此即使状态文件没有变化，快照也视为最新，不会触发 API 请求；
+        无法确认主节点时不刷新时间戳，快照过期后 /uptime_status 会自行拉取。
+        """
+        for account in self.accounts:
+            state_store = account.state_store
+            if state_store.path is None:
+                continue
+            try:
+                mtime = state_store.path.stat().st_mtime_ns
+            except OSError:
+                continue
+            if mtime != account.shared_state_mtime:
+                await asyncio.to_thread(state_store.load)
+                account.shared_state_mtime = mtime
+                account.snapshot_cache.sync(state_store.items())
+            elif len(account.snapshot_cache) and self.election.follows_active_leader():
+                account.snapshot_cache.mark_fresh()
 
     async def terminate(self):
         """插件卸载/停用时调用，用于清理资源"""
         logger.info("UptimeRobot 插件终止...")
-        if self.polling_task and not self.polling_task.done():
-            logger.info("正在取消轮询任务...")
-            self.polling_task.cancel()
+        if self._election_task is not None:
+            self._election_task.cancel()
+            await asyncio.gather(self._election_task, return_exceptions=True)
+            self._election_task = None
+        await self._stop_polling()
+        if self._webhook is not None:
+            # 先停止接收告警，避免关闭过程中的推送再进入已关闭的组件
+            await self._webhook.stop()
+            self._webhook = None
+
+        for account in self.accounts:
+            account.correlator.flush()  # 发出事件窗口中尚未发送的变化
+        await self.notifier.close()
+        if self.history is not None:
+            await self.history.close()
+        await asyncio.gather(*(account.state_store.close() for account in self.accounts))
+        await self._close_http_session()
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+            self._metrics_runner = None
+        if self.election is not None and self.election.is_leader:
+            # 状态已写入共享文件，释放租约让其他实例立即接管
             try:
-                await self.polling_task  # 等待任务实际完成取消
-                logger.info("轮询任务已成功取消。")
-            except asyncio.CancelledError:
-                logger.info("轮询任务取消确认。")  # 正常取消
+                await asyncio.to_thread(self.election.release)
+                logger.info("已释放主节点租约。")
             except Exception as e:
-                logger.error(f"等待轮询任务取消时发生错误: {e}", exc_info=True)
-        else:
-            logger.info("轮询任务不存在或已完成，无需取消。")
+                logger.error(f"释放主节点租约时出错: {e}", exc_info=True)
+            self.election.is_leader = False
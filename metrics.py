@@ -0,0 +1,215 @@
+import bisect
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from astrbot.api import logger
+
+# 直方图分桶上界 (秒)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DRIFT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+WRITE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 指标定义: 名称 -> (类型, 说明, 直方图分桶)
+METRIC_DEFINITIONS: Dict[str, Tuple[str, str, Optional[Sequence[float]]]] = {
+    'uptimerobot_api_request_seconds': ('histogram', 'UptimeRobot API 调用耗时 (不含速率预算等待)', LATENCY_BUCKETS),
+    'uptimerobot_api_requests_total': ('counter', 'UptimeRobot API 调用次数', None),
+    'uptimerobot_api_errors_total': ('counter', 'UptimeRobot API 调用失败次数 (按 error.type)', None),
+    'uptimerobot_rate_limit_wait_seconds': ('histogram', '等待速率预算的时间', LATENCY_BUCKETS),
+    'uptimerobot_poll_duration_seconds': ('histogram', '单次轮询耗时', LATENCY_BUCKETS),
+    'uptimerobot_poll_failures_total': ('counter', '失败的轮询次数', None),
+    'uptimerobot_poll_drift_seconds': ('histogram', '轮询实际开始时间相对计划时间的延迟', DRIFT_BUCKETS),
+    'uptimerobot_poll_bytes_total': ('counter', '轮询接收的 getMonitors 响应字节数 (kind: wire=按 Content-Length，'
+                                     'wire_estimated=响应无 Content-Length 时按解压后大小计，decoded=解压后)', None),
+    'uptimerobot_poll_parse_seconds': ('histogram', '单次轮询中 JSON 解析的累计耗时', WRITE_BUCKETS),
+    'uptimerobot_status_changes_total': ('counter', '检测到的状态变化数', None),
+    'uptimerobot_notification_send_seconds': ('histogram', '单次通知发送耗时', LATENCY_BUCKETS),
+    'uptimerobot_notification_lag_seconds': ('histogram', '通知从检测到状态变化 (含事件窗口等待) 到发送成功的延迟', LATENCY_BUCKETS),
+    'uptimerobot_notifications_total': ('counter', '通知发送结果', None),
+    'uptimerobot_notification_queue_depth': ('gauge', '待发送的通知数', None),
+    'uptimerobot_webhook_events_total': ('counter', 'Webhook 请求的处理结果', None),
+    'uptimerobot_state_write_seconds': ('histogram', '状态文件写入耗时', WRITE_BUCKETS),
+    'uptimerobot_poll_interval_seconds': ('gauge', '当前有效轮询间隔', None),
+    'uptimerobot_rate_limit_remaining': ('gauge', '当前剩余的请求预算', None),
+    'uptimerobot_monitors': ('gauge', '内存中跟踪的监控项数', None),
+    'uptimerobot_pending_confirmations': ('gauge', '等待连续观察确认的状态变化数', None),
+    'uptimerobot_flapping_monitors': ('gauge', '处于抖动抑制中的监控项数', None),
+    'uptimerobot_leader': ('gauge', '本实例是否为主节点 (未启用选举时恒为 1)', None),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """固定分桶的直方图，observe 为 O(log 分桶数)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按分桶线性插值估算分位数"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - cumulative) / bucket_count)
+            cumulative += bucket_count
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+def _labels_key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label_value(value)}"' for key, value in items) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PluginMetrics:
+    """插件运行指标的注册表
+
+    热路径上只做字典查找与计数；gauge 由采集函数在渲染前刷新。
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self.started_at = time.time()
+
+    def observe(self, name: str, value: float, **labels):
+        series = self._histograms.setdefault(name, {})
+        key = _labels_key(labels) if labels else ()
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(METRIC_DEFINITIONS[name][2] or LATENCY_BUCKETS)
+        histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        series = self._counters.setdefault(name, {})
+        key = _labels_key(labels) if labels else ()
+        series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        self._gauges.setdefault(name, {})[_labels_key(labels) if labels else ()] = value
+
+    def add_collector(self, collector: Callable[[], None]):
+        """注册在渲染前调用的采集函数 (用于刷新 gauge)"""
+        self._collectors.append(collector)
+
+    def collect(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"采集插件指标时出错: {e}", exc_info=True)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(_labels_key(labels))
+
+    def merged_histogram(self, name: str) -> Optional[Histogram]:
+        """合并某个直方图所有标签组合的数据"""
+        series = self._histograms.get(name)
+        if not series:
+            return None
+        merged = None
+        for histogram in series.values():
+            if merged is None:
+                merged = Histogram(histogram.buckets)
+            merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+            merged.count += histogram.count
+            merged.sum += histogram.sum
+            merged.max = max(merged.max, histogram.max)
+        return merged
+
+    def counter(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(_labels_key(labels), 0)
+
+    def counter_series(self, name: str) -> Dict[Labels, float]:
+        return dict(self._counters.get(name, {}))
+
+    def gauge(self, name: str, **labels) -> Optional[float]:
+        return self._gauges.get(name, {}).get(_labels_key(labels))
+
+    def render_prometheus(self) -> str:
+        """渲染为 Prometheus 文本格式 (0.0.4)"""
+        self.collect()
+        lines = []
+        for name, (metric_type, help_text, _) in METRIC_DEFINITIONS.items():
+            if metric_type == 'histogram':
+                series = self._histograms.get(name)
+            elif metric_type == 'counter':
+                series = self._counters.get(name)
+            else:
+                series = self._gauges.get(name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in sorted(series.items()):
+                if metric_type != 'histogram':
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for upper, bucket_count in zip(list(value.buckets) + [float('inf')], value.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(upper)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+        return '\n'.join(lines) + '\n'
+
+
+async def start_metrics_server(metrics: PluginMetrics, host: str, port: int):
+    """启动本地 Prometheus 抓取端点 (GET /metrics)，返回用于停止服务的 AppRunner"""
+    from aiohttp import web
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(body=metrics.render_prometheus().encode('utf-8'),
+                            headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except Exception:
+        await runner.cleanup()
+        raise
+    logger.info(f"Prometheus 指标端点已启动: http://{host}:{port}/metrics")
+    return runner
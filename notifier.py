@@ -0,0 +1,156 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from astrbot.api import logger
+from astrbot.api.message_components import Plain
+
+if TYPE_CHECKING:
+    from .metrics import PluginMetrics
+
+SEND_TIMEOUT = 10  # 单次发送超时 (秒)
+SEND_MAX_RETRIES = 3  # 发送失败后的最大重试次数
+SEND_RETRY_BASE_DELAY = 2  # 重试退避的基础间隔 (秒)，按 2^n 递增
+DEFAULT_SEND_CONCURRENCY = 4  # 同时进行中的发送数上限
+CLOSE_DRAIN_TIMEOUT = 5  # 插件停用时等待队列清空的最长时间 (秒)
+
+
+def parse_notification_targets(raw_targets: Any) -> List[str]:
+    """校验并规范化通知目标列表，格式为 '平台:类型:ID'，无效项会被跳过"""
+    if not isinstance(raw_targets, list):
+        logger.warning(f"配置中的 notification_targets 不是列表 (类型: {type(raw_targets)})，不发送通知。")
+        return []
+    targets = []
+    for raw in raw_targets:
+        if not isinstance(raw, (str, int)):
+            continue
+        target = str(raw).strip()
+        if not target:
+            continue
+        parts = target.split(':', 2)
+        if len(parts) != 3 or not all(part.strip() for part in parts):
+            logger.warning(f"无效的通知目标格式: '{target}'。期望格式为 '平台:类型:ID' (例如 'qq:private:123' 或 'qq:group:456')。已跳过此目标。")
+            continue
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+class NotificationDispatcher:
+    """状态变更通知分发器
+
+    每个目标会话拥有独立的有序队列和工作协程，所有目标共享一个并发上限。
+    投递与轮询节奏解耦: 轮询循环只负责入队，发送的超时与重试在后台完成。
+    """
+
+    def __init__(self, context, concurrency: int = DEFAULT_SEND_CONCURRENCY,
+                 metrics: Optional["PluginMetrics"] = None):
+        self.context = context
+        self.metrics = metrics
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._raw_targets: Optional[Tuple] = None
+        self.targets: List[str] = []
+
+        # 统计计数
+        self.sent = 0
+        self.failed = 0
+
+    def update_targets(self, raw_targets: Any) -> List[str]:
+        """配置变化时才重新解析通知目标，返回当前有效目标"""
+        key = tuple(raw_targets) if isinstance(raw_targets, list) else (raw_targets,)
+        if key != self._raw_targets:
+            self._raw_targets = key
+            self.targets = parse_notification_targets(raw_targets)
+        return self.targets
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def submit(self, text: str, targets: Optional[List[str]] = None, detected_at: Optional[float] = None):
+        """将一条消息加入各目标的发送队列，不等待发送完成
+
+        detected_at 为消息对应变化被检测到的时间 (time.monotonic())，通知延迟从此时算起，默认为入队时间。
+        """
+        if detected_at is None:
+            detected_at = time.monotonic()
+        for target in (self.targets if targets is None else targets):
+            queue = self._queues.get(target)
+            if queue is None:
+                queue = self._queues[target] = asyncio.Queue()
+            queue.put_nowait((text, detected_at))
+            worker = self._workers.get(target)
+            if worker is None or worker.done():
+                self._workers[target] = asyncio.create_task(self._worker(target, queue))
+
+    async def _worker(self, target: str, queue: asyncio.Queue):
+        while True:
+            text, enqueued_at = await queue.get()
+            try:
+                await self._send_with_retry(target, text, enqueued_at)
+            finally:
+                queue.task_done()
+
+    def _record_result(self, result: str, enqueued_at: Optional[float] = None):
+        if result == 'sent':
+            self.sent += 1
+        else:
+            self.failed += 1
+        if self.metrics is not None:
+            self.metrics.inc('uptimerobot_notifications_total', result=result)
+            if enqueued_at is not None:
+                self.metrics.observe('uptimerobot_notification_lag_seconds', time.monotonic() - enqueued_at)
+
+    async def _send_with_retry(self, target: str, text: str, enqueued_at: Optional[float] = None):
+        message_list = [Plain(text=text)]
+        for attempt in range(SEND_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:  # 仅在实际发送时占用并发名额，退避等待时不占用
+                    send_started_at = time.monotonic()
+                    try:
+                        sent = await asyncio.wait_for(self.context.send_message(target, message_list), SEND_TIMEOUT)
+                    finally:
+                        if self.metrics is not None:
+                            self.metrics.observe('uptimerobot_notification_send_seconds',
+                                                 time.monotonic() - send_started_at)
+                if sent:
+                    self._record_result('sent', enqueued_at)
+                    logger.info(f"已成功向 {target} 发送通知。")
+                else:
+                    # 平台不存在等情况重试也无济于事
+                    self._record_result('failed')
+                    logger.warning(f"发送通知到 {target} 失败 (平台不支持或未找到会话)。")
+                return
+            except asyncio.CancelledError:
+                raise
+            except ValueError as e:
+                self._record_result('failed')
+                logger.error(f"通知目标 {target} 不合法: {e}")
+                return
+            except asyncio.TimeoutError:
+                error_desc = f"超时 ({SEND_TIMEOUT} 秒)"
+            except Exception as e:
+                error_desc = str(e)
+            if attempt < SEND_MAX_RETRIES:
+                delay = SEND_RETRY_BASE_DELAY * (2 ** attempt)
+                logger.warning(f"向 {target} 发送通知失败: {error_desc}，{delay} 秒后重试 ({attempt + 1}/{SEND_MAX_RETRIES})。")
+                await asyncio.sleep(delay)
+            else:
+                self._record_result('failed')
+                logger.error(f"向 {target} 发送通知失败，已放弃: {error_desc}")
+
+    async def close(self):
+        """尽量发送完队列中的消息，然后停止所有工作协程"""
+        if self._queues:
+            try:
+                await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues.values())),
+                                       CLOSE_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"停用时仍有 {self.queue_depth} 条通知未发送，已丢弃。")
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
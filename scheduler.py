@@ -0,0 +1,126 @@
+import asyncio
+import time
+from typing import Optional
+
+from astrbot.api import logger
+
+DEFAULT_RATE_LIMIT = 10  # UptimeRobot 免费版: 每分钟 10 次请求
+MIN_POLLING_INTERVAL = 10  # 轮询间隔下限 (秒)
+MAX_BACKOFF_INTERVAL = 600  # 失败退避的间隔上限 (秒)
+
+
+class TokenBucket:
+    """API Key 的令牌桶，所有 API 调用 (轮询、分页、用户指令) 共享同一预算"""
+
+    def __init__(self, rate_per_minute: float = DEFAULT_RATE_LIMIT, capacity: Optional[float] = None):
+        self.rate_per_minute = max(1.0, float(rate_per_minute))
+        self.capacity = float(capacity) if capacity else self.rate_per_minute
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0  # 服务端要求暂停请求的截止时间
+        self._lock = asyncio.Lock()
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.rate_per_minute / 60.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    @property
+    def remaining(self) -> float:
+        """当前可用的请求预算 (令牌数)"""
+        self._refill()
+        if time.monotonic() < self._blocked_until:
+            return 0.0
+        return self._tokens
+
+    def wait_time(self) -> float:
+        """获取下一个令牌需要等待的秒数"""
+        self._refill()
+        wait = max(0.0, self._blocked_until - time.monotonic())
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.refill_per_second)
+        return wait
+
+    async def acquire(self):
+        """取走一个令牌，预算不足时等待"""
+        async with self._lock:  # 保证等待者按先来后到获得令牌
+            while True:
+                wait = self.wait_time()
+                if wait <= 0:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep(wait)
+
+    def configure(self, rate_per_minute: float):
+        rate_per_minute = max(1.0, float(rate_per_minute))
+        if rate_per_minute != self.rate_per_minute:
+            self._refill()
+            self.rate_per_minute = self.capacity = rate_per_minute
+            self._tokens = min(self._tokens, self.capacity)
+
+    def sync_remaining(self, remaining: int):
+        """根据服务端返回的剩余配额收紧本地预算"""
+        self._refill()
+        self._tokens = min(self._tokens, float(remaining))
+
+    def penalize(self, retry_after: float):
+        """收到限流响应: 清空预算并在 retry_after 秒内暂停请求"""
+        self._refill()
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + max(0.0, retry_after))
+        logger.warning(f"UptimeRobot API 触发限流，将暂停请求 {retry_after:.0f} 秒。")
+
+
+class PollScheduler:
+    """自适应轮询调度
+
+    - 存在"疑似宕机"的监控项时使用更短的间隔
+    - 连续失败时按指数退避，收到限流响应时至少等待服务端要求的时间
+    - 间隔不小于本轮请求数在速率预算下所需的时间
+    - 间隔从每次轮询开始时计算，不随轮询耗时漂移
+    """
+
+    def __init__(self, bucket: TokenBucket, base_interval: float = 60, suspect_interval: float = 20):
+        self.bucket = bucket
+        self.base_interval = base_interval
+        self.suspect_interval = suspect_interval
+        self.consecutive_failures = 0
+        self.has_suspect = False
+        self._last_requests = 1
+        self._retry_after = 0.0
+        self.effective_interval = float(base_interval)
+
+    def configure(self, base_interval: float, suspect_interval: float):
+        self.base_interval = max(MIN_POLLING_INTERVAL, base_interval)
+        self.suspect_interval = min(self.base_interval, max(MIN_POLLING_INTERVAL, suspect_interval))
+
+    def record_success(self, has_suspect: bool, requests_used: Optional[int] = 1):
+        """记录一次成功的轮询；requests_used 为 None 时沿用上次完整轮询的请求数"""
+        self.consecutive_failures = 0
+        self.has_suspect = has_suspect
+        if requests_used is not None:
+            self._last_requests = max(1, requests_used)
+        self._retry_after = 0.0
+        self.effective_interval = self._compute_interval()
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        self.consecutive_failures += 1
+        self._retry_after = retry_after or 0.0
+        self.effective_interval = self._compute_interval()
+
+    def _compute_interval(self) -> float:
+        interval = self.suspect_interval if self.has_suspect else self.base_interval
+        if self.consecutive_failures:
+            interval = min(MAX_BACKOFF_INTERVAL,
+                           max(interval, self.base_interval * (2 ** (self.consecutive_failures - 1))))
+        # 按上一轮消耗的请求数估算，保证轮询本身不会耗尽速率预算
+        budget_floor = self._last_requests * 60.0 / self.bucket.rate_per_minute
+        return max(interval, budget_floor, self._retry_after, MIN_POLLING_INTERVAL)
+
+    def next_delay(self, cycle_started_at: float) -> float:
+        """距离下一轮轮询开始的秒数 (以本轮开始时间为基准)"""
+        return max(0.0, cycle_started_at + self.effective_interval - time.monotonic())
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Collection, Dict, Iterable, List, Optional, Tuple
+
+from .decoding import MonitorRecord
+
+MonitorList = List[MonitorRecord]
+FetchResult = Tuple[MonitorList, Optional[str]]
+
+
+def filter_monitors(monitors: Iterable[MonitorRecord], statuses: Optional[Collection[Any]] = None,
+                    name_query: str = "") -> MonitorList:
+    """按状态与名称子串 (不区分大小写) 线性过滤，用于没有索引的监控项列表"""
+    name_query = name_query.lower()
+    return [monitor for monitor in monitors
+            if (statuses is None or monitor.status in statuses)
+            and (not name_query or name_query in str(monitor.friendly_name).lower())]
+
+
+def _id_sort_key(monitor_id: Any) -> Tuple[int, Any]:
+    """监控项 ID 的排序键 (整数 ID 在前，其余按字符串)，使快照顺序不取决于分页到达的先后"""
+    return (0, monitor_id) if isinstance(monitor_id, int) else (1, str(monitor_id))
+
+
+class SnapshotCache:
+    """供 /uptime_status 使用的监控快照缓存
+
+    轮询循环在每次完整轮询后刷新快照；快照过期时，并发的查询请求
+    合并到同一个进行中的拉取 (single-flight)，避免重复消耗 API 配额。
+    快照按状态和名称建立索引并缓存每个监控项渲染好的行。与状态索引同步过一次之后，
+    完整轮询只把状态索引报告的变化 (sync_changes) 应用到快照，不再遍历全部监控项。
+    新加入的监控项按 ID 排序后追加，分页顺序不影响 /uptime_status 的翻页结果。
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._records: Dict[Any, MonitorRecord] = {}  # id -> 监控项，保持 API 返回顺序
+        self._by_status: Dict[Any, Dict[Any, None]] = {}  # status -> 有序 id 集合
+        self._by_name: Dict[str, Dict[Any, None]] = {}  # 小写名称 -> 有序 id 集合
+        self._lines: Dict[Any, str] = {}  # id -> 渲染好的状态行
+        self._order: Dict[Any, int] = {}  # id -> 加入快照的顺序，保证查询结果与完整列表顺序一致
+        self._next_order = 0
+        self.updated_at: Optional[float] = None  # time.monotonic()
+        self.store_synced = False  # 快照内容是否与状态索引一致 (可以只应用增量)
+        self._inflight: Optional[asyncio.Future] = None
+
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def age(self) -> Optional[float]:
+        """快照年龄 (秒)，尚无快照时为 None"""
+        if self.updated_at is None:
+            return None
+        return time.monotonic() - self.updated_at
+
+    def is_fresh(self) -> bool:
+        age = self.age
+        return age is not None and age <= self.ttl
+
+    @property
+    def monitors(self) -> MonitorList:
+        return list(self._records.values())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _index(self, record: MonitorRecord):
+        monitor_id = record.id
+        self._by_status.setdefault(record.status, {})[monitor_id] = None
+        self._by_name.setdefault(str(record.friendly_name).lower(), {})[monitor_id] = None
+
+    def _unindex(self, record: MonitorRecord):
+        monitor_id = record.id
+        for index, key in ((self._by_status, record.status), (self._by_name, str(record.friendly_name).lower())):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(monitor_id, None)
+                if not ids:
+                    del index[key]
+        self._lines.pop(monitor_id, None)
+
+    def _set(self, monitor_id: Any, status: Any, friendly_name: str):
+        record = self._records.get(monitor_id)
+        if record is None:
+            record = self._records[monitor_id] = MonitorRecord(monitor_id, friendly_name, status)
+            self._order[monitor_id] = self._next_order
+            self._next_order += 1
+            self._index(record)
+        elif record.status != status or record.friendly_name != friendly_name:
+            self._unindex(record)
+            record.status = status
+            record.friendly_name = friendly_name
+            self._index(record)
+
+    def _remove(self, monitor_id: Any):
+        record = self._records.pop(monitor_id, None)
+        if record is not None:
+            self._unindex(record)
+            del self._order[monitor_id]
+
+    def sync(self, states: Iterable[Tuple[Any, Tuple[Any, str]]]):
+        """以状态索引的完整 (id, (status, friendly_name)) 列表刷新快照，只有变化的监控项会更新索引与渲染缓存"""
+        seen = set()
+        for monitor_id, (status, friendly_name) in sorted(states, key=lambda item: _id_sort_key(item[0])):
+            seen.add(monitor_id)
+            self._set(monitor_id, status, friendly_name)
+        if len(seen) != len(self._records):
+            for monitor_id in [monitor_id for monitor_id in self._records if monitor_id not in seen]:
+                self._remove(monitor_id)
+        self.updated_at = time.monotonic()
+        self.store_synced = True
+
+    def sync_changes(self, changed_ids: Iterable[Any],
+                     get_state: Callable[[Any], Optional[Tuple[Any, str]]]):
+        """只刷新状态索引报告变化的监控项；get_state 返回 None 表示监控项已被删除"""
+        for monitor_id in sorted(changed_ids, key=_id_sort_key):
+            state = get_state(monitor_id)
+            if state is None:
+                self._remove(monitor_id)
+            else:
+                self._set(monitor_id, *state)
+        self.updated_at = time.monotonic()
+
+    def update(self, monitors: Iterable[MonitorRecord]):
+        """以拉取到的完整监控项列表刷新快照 (之后需要与状态索引完整同步一次)"""
+        self.sync((monitor.id, (monitor.status, monitor.friendly_name)) for monitor in monitors)
+        self.store_synced = False
+
+    def mark_fresh(self):
+        """数据由其他途径确认仍然最新 (如主节点仍在轮询) 时刷新时间戳"""
+        self.updated_at = time.monotonic()
+
+    def patch(self, monitor_id: Any, status: Any, friendly_name: str):
+        """就地更新单个监控项 (如 Webhook 推送)，不改变快照的刷新时间"""
+        if self.updated_at is None:
+            return  # 尚无完整快照，等待首次完整轮询
+        self._set(monitor_id, status, friendly_name)
+
+    def query(self, statuses: Optional[Collection[Any]] = None, name_query: str = "") -> MonitorList:
+        """按状态与名称子串 (不区分大小写) 查询快照
+
+        状态直接查索引；名称只需扫描去重后的小写名称，而不是逐个监控项重新转换大小写。
+        """
+        if statuses is None and not name_query:
+            return self.monitors
+        candidates: Optional[Dict[Any, None]] = None
+        if statuses is not None:
+            candidates = {}
+            for status in statuses:
+                candidates.update(self._by_status.get(status, {}))
+        if name_query:
+            name_query = name_query.lower()
+            matched: Dict[Any, None] = {}
+            for name, ids in self._by_name.items():
+                if name_query in name:
+                    matched.update(ids)
+            candidates = matched if candidates is None else {
+                monitor_id: None for monitor_id in candidates if monitor_id in matched}
+        return [self._records[monitor_id] for monitor_id in sorted(candidates, key=self._order.__getitem__)]
+
+    def render_line(self, record: MonitorRecord, render: Callable[[MonitorRecord], str]) -> str:
+        """返回监控项渲染好的状态行；仅在首次或监控项变化后调用 render"""
+        monitor_id = record.id
+        line = self._lines.get(monitor_id)
+        if line is None:
+            line = render(record)
+            if self._records.get(monitor_id) is record:  # 只缓存快照中的监控项
+                self._lines[monitor_id] = line
+        return line
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'age': self.age,
+            'size': len(self._records),
+        }
+
+    async def get(self, fetch: Callable[[], Awaitable[FetchResult]]) -> FetchResult:
+        """获取快照；过期时调用 fetch 刷新，并发调用共享同一次拉取
+
+        拉取完全失败时返回旧快照 (可能为空) 及错误信息，由调用方提示数据可能过期；
+        部分分页失败时返回已获取的部分及错误信息。
+        """
+        if self.is_fresh():
+            self.hits += 1
+            return self.monitors, None
+
+        if self._inflight is not None:
+            self.coalesced += 1
+            # shield: 某个等待者被取消时不影响其他等待者共享的拉取
+            return await asyncio.shield(self._inflight)
+
+        self.misses += 1
+        self._inflight = asyncio.ensure_future(self._refresh(fetch))
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self, fetch: Callable[[], Awaitable[FetchResult]]) -> FetchResult:
+        try:
+            monitors, error_msg = await fetch()
+            if not error_msg:
+                self.update(monitors)
+                return self.monitors, None
+            if monitors:
+                return monitors, error_msg
+            return self.monitors, error_msg
+        finally:
+            self._inflight = None
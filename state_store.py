@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from astrbot.api import logger
+
+if TYPE_CHECKING:
+    from .metrics import PluginMetrics
+
+STATE_FILE_VERSION = 2
+
+
+class MonitorStateStore:
+    """监控状态的内存索引 (id -> 状态)，以写后 (write-behind) 方式原子持久化
+
+    文件中每个监控项只保存精简记录 [id, status, friendly_name]，
+    仅在状态发生变化后才写盘，写入在线程池中通过临时文件 + 重命名完成。
+    """
+
+    def __init__(self, path: Optional[Path], metrics: Optional["PluginMetrics"] = None):
+        self.path = path
+        self.metrics = metrics
+        self._states: Dict[Any, Tuple[Any, str]] = {}  # id -> (status, friendly_name)
+        self._dirty = False
+        self._changed: Set[Any] = set()  # 自上次 take_changed() 以来新增、变化或移除的监控项
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def get_status(self, monitor_id: Any) -> Optional[Any]:
+        """获取监控项上次记录的状态，不存在时返回 None"""
+        record = self._states.get(monitor_id)
+        return record[0] if record else None
+
+    def get_name(self, monitor_id: Any) -> Optional[str]:
+        """获取监控项上次记录的名称，不存在时返回 None"""
+        record = self._states.get(monitor_id)
+        return record[1] if record else None
+
+    def get(self, monitor_id: Any) -> Optional[Tuple[Any, str]]:
+        """获取监控项上次记录的 (status, friendly_name)，不存在时返回 None"""
+        return self._states.get(monitor_id)
+
+    def items(self) -> Iterable[Tuple[Any, Tuple[Any, str]]]:
+        return self._states.items()
+
+    def take_changed(self) -> Set[Any]:
+        """返回并清空自上次调用以来新增、变化或移除的监控项 ID (供快照增量刷新)"""
+        changed, self._changed = self._changed, set()
+        return changed
+
+    def update(self, monitor_id: Any, status: Any, name: str) -> Optional[Any]:
+        """记录监控项的最新状态，返回更新前的状态 (新监控项返回 None)"""
+        record = self._states.get(monitor_id)
+        if record is None or record[0] != status or record[1] != name:
+            self._states[monitor_id] = (status, name)
+            self._dirty = True
+            self._changed.add(monitor_id)
+        return record[0] if record else None
+
+    def prune(self, seen_ids: Iterable[Any]) -> int:
+        """移除完整轮询中未出现的监控项 (已被删除)，返回移除数量"""
+        seen = set(seen_ids)
+        stale = [monitor_id for monitor_id in self._states if monitor_id not in seen]
+        for monitor_id in stale:
+            del self._states[monitor_id]
+        self._changed.update(stale)
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    # --- 持久化 ---
+    def load(self):
+        """从文件加载上次保存的状态 (兼容旧版保存完整 API 响应的格式)"""
+        if not self.path:
+            logger.error("上次状态文件路径未设置，无法读取。")
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except FileNotFoundError:
+            logger.info("上次状态文件不存在，将从空状态开始。")
+            return
+        except Exception as e:
+            logger.error(f"读取上次状态文件时发生未知错误: {e}", exc_info=True)
+            return
+        if not content:  # 处理空文件情况
+            return
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error(f"解析上次状态文件失败: {e}. 文件内容可能已损坏。", exc_info=True)
+            return
+
+        states: Dict[Any, Tuple[Any, str]] = {}
+        monitors = data.get('monitors', []) if isinstance(data, dict) else []
+        for entry in monitors:
+            if isinstance(entry, list) and len(entry) >= 3:
+                states[entry[0]] = (entry[1], entry[2])
+            elif isinstance(entry, dict) and entry.get('id') is not None:
+                # 旧版格式: 完整的 monitor 对象
+                states[entry['id']] = (entry.get('status'), entry.get('friendly_name', f"ID: {entry['id']}"))
+        self._states = states
+        self._dirty = False
+        self._changed.clear()  # 载入后由调用方完整刷新快照
+        logger.info(f"已从状态文件加载 {len(states)} 个监控项的上次状态。")
+
+    def _serialize(self) -> str:
+        records: List[list] = [[monitor_id, status, name] for monitor_id, (status, name) in self._states.items()]
+        return json.dumps({'version': STATE_FILE_VERSION, 'monitors': records},
+                          ensure_ascii=False, separators=(',', ':'))
+
+    def _write_atomic(self, content: str):
+        # 临时文件名带进程号: 共享数据目录中的多个实例同时写入时互不干扰
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def flush(self):
+        """若状态有变化，则在线程池中原子写入状态文件"""
+        if not self.path:
+            logger.error("上次状态文件路径未设置，无法写入。")
+            return
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            # 在事件循环上序列化快照，保证与后续更新互不干扰；写盘在线程池中完成
+            content = self._serialize()
+            self._dirty = False
+            try:
+                write_started_at = time.perf_counter()
+                await asyncio.to_thread(self._write_atomic, content)
+                if self.metrics is not None:
+                    self.metrics.observe('uptimerobot_state_write_seconds', time.perf_counter() - write_started_at)
+            except Exception as e:
+                self._dirty = True  # 下次再试
+                logger.error(f"写入当前状态文件时发生错误: {e}", exc_info=True)
+
+    def schedule_flush(self):
+        """安排一次后台写盘，不阻塞调用方"""
+        if not self._dirty:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def wait_flushed(self):
+        """等待正在进行的后台写盘完成，不再写入之后的变更"""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+
+    async def close(self):
+        """等待后台写盘完成，并写入尚未持久化的变更"""
+        await self.wait_flushed()
+        await self.flush()
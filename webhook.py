@@ -0,0 +1,148 @@
+import hmac
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from astrbot.api import logger
+
+DEFAULT_WEBHOOK_HOST = "0.0.0.0"
+DEFAULT_WEBHOOK_PATH = "/uptimerobot/webhook"
+WEBHOOK_MAX_BODY = 64 * 1024  # 单个告警请求体的上限 (字节)
+
+# UptimeRobot 告警联系人的 *alertType*: 1 = 宕机, 2 = 恢复 (其他类型如 SSL 到期不影响状态)
+ALERT_TYPE_STATUS = {
+    1: 9,
+    2: 2,
+}
+
+
+class WebhookEvent:
+    """一条 UptimeRobot 告警联系人 Webhook 推送"""
+    __slots__ = ('account', 'monitor_id', 'status', 'friendly_name', 'alert_time', 'details')
+
+    def __init__(self, account: Optional[str], monitor_id: int, status: int, friendly_name: Optional[str],
+                 alert_time: Optional[float], details: str):
+        self.account = account
+        self.monitor_id = monitor_id
+        self.status = status
+        self.friendly_name = friendly_name
+        self.alert_time = alert_time
+        self.details = details
+
+
+def parse_webhook_event(fields: Mapping[str, Any]) -> Optional[WebhookEvent]:
+    """解析 Webhook 参数 (查询字符串与请求体合并后)，无法识别或与状态无关的告警返回 None
+
+    参数名与 UptimeRobot 的告警变量一致: monitorID、alertType、monitorFriendlyName、
+    alertDateTime、alertDetails；可选的 account 指定账号名称。
+    """
+    try:
+        monitor_id = int(fields.get('monitorID'))
+        alert_type = int(fields.get('alertType'))
+    except (TypeError, ValueError):
+        return None
+    status = ALERT_TYPE_STATUS.get(alert_type)
+    if status is None:
+        return None
+    try:
+        alert_time = float(fields['alertDateTime']) if fields.get('alertDateTime') else None
+    except (TypeError, ValueError):
+        alert_time = None
+    return WebhookEvent(
+        account=str(fields['account']) if fields.get('account') else None,
+        monitor_id=monitor_id,
+        status=status,
+        friendly_name=str(fields['monitorFriendlyName']) if fields.get('monitorFriendlyName') else None,
+        alert_time=alert_time,
+        details=str(fields.get('alertDetails') or ''),
+    )
+
+
+class WebhookReceiver:
+    """接收 UptimeRobot 告警联系人 Webhook 的内嵌 HTTP 服务
+
+    请求需携带共享密钥 (查询参数 secret 或请求头 X-Webhook-Secret)，支持 GET 与 POST
+    (表单或 JSON)。解析出的事件交给 handler 处理，handler 返回是否产生了状态变化。
+    """
+
+    def __init__(self, handler: Callable[[WebhookEvent], Awaitable[bool]], secret: str,
+                 host: str = DEFAULT_WEBHOOK_HOST, port: int = 0, path: str = DEFAULT_WEBHOOK_PATH,
+                 on_result: Optional[Callable[[str], None]] = None):
+        self.handler = handler
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path if path.startswith('/') else f'/{path}'
+        self.on_result = on_result  # 用于统计各类处理结果
+        self._runner = None
+        self.bound_port: Optional[int] = None
+
+    def _record(self, result: str):
+        if self.on_result is not None:
+            self.on_result(result)
+
+    def _authorized(self, request) -> bool:
+        provided = request.headers.get('X-Webhook-Secret') or request.query.get('secret') or ''
+        return hmac.compare_digest(provided.encode('utf-8'), self.secret.encode('utf-8'))
+
+    async def _read_fields(self, request) -> Dict[str, Any]:
+        fields: Dict[str, Any] = dict(request.query)
+        if request.method == 'POST' and request.can_read_body:
+            if request.content_type == 'application/json':
+                body = await request.json()
+                if isinstance(body, dict):
+                    fields.update(body)
+            else:
+                fields.update(await request.post())
+        fields.pop('secret', None)
+        return fields
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        if not self._authorized(request):
+            self._record('unauthorized')
+            logger.warning(f"拒绝了来自 {request.remote} 的 Webhook 请求 (密钥不匹配)。")
+            return web.Response(status=401, text='unauthorized')
+        try:
+            fields = await self._read_fields(request)
+        except (ValueError, web.HTTPException) as e:
+            self._record('invalid')
+            logger.warning(f"无法解析 Webhook 请求体: {e}")
+            return web.Response(status=400, text='invalid body')
+
+        event = parse_webhook_event(fields)
+        if event is None:
+            # 非状态类告警 (如 SSL 到期) 也返回 200，避免 UptimeRobot 重试
+            self._record('ignored')
+            logger.debug(f"忽略无法识别或与状态无关的 Webhook 告警: {fields}")
+            return web.Response(text='ignored')
+        try:
+            changed = await self.handler(event)
+        except Exception as e:
+            self._record('error')
+            logger.error(f"处理 Webhook 告警时出错: {e}", exc_info=True)
+            return web.Response(status=500, text='error')
+        self._record('changed' if changed else 'unchanged')
+        return web.Response(text='ok')
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application(client_max_size=WEBHOOK_MAX_BODY)
+        app.router.add_route('GET', self.path, self._handle)
+        app.router.add_route('POST', self.path, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        try:
+            await site.start()
+        except Exception:
+            await self.stop()
+            raise
+        sockets = getattr(site._server, 'sockets', None) or []
+        self.bound_port = sockets[0].getsockname()[1] if sockets else self.port
+        logger.info(f"Webhook 接收端已启动: http://{self.host}:{self.bound_port}{self.path}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None